@@ -1,9 +1,14 @@
+import sys
+from pathlib import Path
 import torch
 import numpy as np
 from datetime import datetime, timedelta
 from priority_model import DualTPMD, DualHeadPriority
 import random
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[4] / "Client" / "pc"))
+from ml.working_hours import working_hours_between
+
 
 random.seed(41)
 np.random.seed(41)
@@ -39,35 +44,8 @@ classes_by_urgency = [
     (0, 4, "Casual")
 ]
 def calculate_working_hours(deadline_str):
-    WORK_START = 10
-    WORK_END = 18
-    now = datetime.now()
     deadline = datetime.strptime(deadline_str, "%d.%m.%Y %H:%M:%S")
-    if deadline <= now:
-        return 0
-    total_working_hours = 0
-    current_time = now
-    while current_time.date() < deadline.date() or (current_time.date() == deadline.date() and current_time.hour < deadline.hour):
-        if current_time.weekday() >= 5:
-            current_time += timedelta(days=1)
-            current_time = current_time.replace(hour=WORK_START, minute=0, second=0, microsecond=0)
-            continue
-        if current_time.hour < WORK_START:
-            current_time = current_time.replace(hour=WORK_START, minute=0, second=0, microsecond=0)
-        if current_time.hour >= WORK_END:
-            current_time += timedelta(days=1)
-            current_time = current_time.replace(hour=WORK_START, minute=0, second=0, microsecond=0)
-            continue
-        end_of_day = current_time.replace(hour=WORK_END, minute=0, second=0, microsecond=0)
-        hours_to_end_of_day = max(0, (end_of_day - current_time).total_seconds() / 3600)
-        if current_time.date() == deadline.date():
-            hours_to_deadline = max(0, (deadline - current_time).total_seconds() / 3600)
-            total_working_hours += min(hours_to_deadline, hours_to_end_of_day)
-            break
-        total_working_hours += hours_to_end_of_day
-        current_time += timedelta(days=1)
-        current_time = current_time.replace(hour=WORK_START, minute=0, second=0, microsecond=0)
-    return round(total_working_hours, 2)
+    return working_hours_between(datetime.now(), deadline)
 
 def get_priority_hours(ideal_hours):
     for low, high, priority in classes_by_hours:
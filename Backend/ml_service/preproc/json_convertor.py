@@ -1,34 +1,6 @@
 import pickle
 import json
 
-with open("dualhead_tpm_encoders.pkl", "rb") as f:
-    encoders = pickle.load(f)
-
-task_type_encoder = encoders["task_type_encoder"]
-priority_encoder = encoders["priority_encoder"]
-
-out = {}
-
-if hasattr(task_type_encoder, "classes_"):
-    out["task_type_mapping"] = {
-        label: int(idx)
-        for idx, label in enumerate(task_type_encoder.classes_)
-    }
-else:
-    out["task_type_mapping"] = {
-        name: int(i)
-        for i, name in enumerate(task_type_encoder.get_feature_names_out())
-    }
-
-out["priority_labels"] = priority_encoder.classes_.tolist()
-
-with open("dualhead_tpm_encoders.json", "w", encoding="utf-8") as f:
-    json.dump(out, f, indent=2, ensure_ascii=False)
-
-print("dualhead_tpm_encoders.json успешно создан")
-
-with open("tlm_scalers.pkl", "rb") as f:
-    scalers = pickle.load(f)
 
 def export_scaler(scaler):
     if hasattr(scaler, "mean_"):
@@ -46,15 +18,54 @@ def export_scaler(scaler):
     else:
         raise ValueError("Unknown scaler type")
 
-out = {
-    "active_tasks": export_scaler(scalers["active_tasks_scaler"]),
-    "avg_priority": export_scaler(scalers["avg_priority_scaler"]),
-    "max_priority": export_scaler(scalers["max_priority_scaler"]),
-    "avg_hours_to_deadline": export_scaler(scalers["avg_hours_to_deadline_scaler"]),
-    "overdue_tasks": export_scaler(scalers["overdue_tasks_scaler"])
-}
 
-with open("tlm_scalers.json", "w", encoding="utf-8") as f:
-    json.dump(out, f, indent=2)
+def export_priority_encoders(encoders):
+    task_type_encoder = encoders["task_type_encoder"]
+    priority_encoder = encoders["priority_encoder"]
+
+    out = {}
+
+    if hasattr(task_type_encoder, "classes_"):
+        out["task_type_mapping"] = {
+            label: int(idx)
+            for idx, label in enumerate(task_type_encoder.classes_)
+        }
+    else:
+        # OneHotEncoder: индекс категории совпадает с номером столбца one-hot
+        out["task_type_mapping"] = {
+            str(name): int(i)
+            for i, name in enumerate(task_type_encoder.categories_[0])
+        }
+
+    out["priority_labels"] = priority_encoder.classes_.tolist()
+    out["hours_scaler"] = export_scaler(encoders["hours_scaler"])
+    out["urgency_scaler"] = export_scaler(encoders["urgency_scaler"])
+    return out
+
+
+def export_capacity_scalers(scalers):
+    return {
+        "active_tasks": export_scaler(scalers["active_tasks_scaler"]),
+        "avg_priority": export_scaler(scalers["avg_priority_scaler"]),
+        "max_priority": export_scaler(scalers["max_priority_scaler"]),
+        "avg_hours_to_deadline": export_scaler(scalers["avg_hours_to_deadline_scaler"]),
+        "overdue_tasks": export_scaler(scalers["overdue_tasks_scaler"])
+    }
+
+
+if __name__ == "__main__":
+    with open("dualhead_tpm_encoders.pkl", "rb") as f:
+        encoders = pickle.load(f)
+
+    with open("dualhead_tpm_encoders.json", "w", encoding="utf-8") as f:
+        json.dump(export_priority_encoders(encoders), f, indent=2, ensure_ascii=False)
+
+    print("dualhead_tpm_encoders.json успешно создан")
+
+    with open("tlm_scalers.pkl", "rb") as f:
+        scalers = pickle.load(f)
+
+    with open("tlm_scalers.json", "w", encoding="utf-8") as f:
+        json.dump(export_capacity_scalers(scalers), f, indent=2)
 
-print("tlm_scalers.json успешно создан")
\ No newline at end of file
+    print("tlm_scalers.json успешно создан")
@@ -0,0 +1,21 @@
+import json
+import torch
+
+
+def export_weights(state_dict_path, json_path):
+    state_dict = torch.load(state_dict_path, map_location=torch.device("cpu"))
+
+    layers = {}
+    for key, tensor in state_dict.items():
+        layer, param = key.rsplit(".", 1)
+        layers.setdefault(layer, {})[param] = tensor.tolist()
+
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(layers, f)
+
+    print(f"{json_path} успешно создан")
+
+
+if __name__ == "__main__":
+    export_weights("dualhead_tpm.pt", "dualhead_tpm_weights.json")
+    export_weights("tlm.pt", "tlm_weights.json")
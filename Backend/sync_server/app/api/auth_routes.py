@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from .. import models, schemas, auth, database
+from .. import schemas, auth, database, crud
 from fastapi.security import OAuth2PasswordRequestForm
 
 router = APIRouter(
@@ -10,26 +11,28 @@ router = APIRouter(
 
 
 @router.post("/register", response_model=schemas.Token)
-def register_user(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user.email).first()
+async def register_user(user: schemas.UserCreate, db: Session = Depends(database.get_db)):
+    db_user = await database.run(db, crud.get_user_by_email, user.email)
     if db_user:
         raise HTTPException(
             status_code=400,
             detail="Email already registered"
         )
+    # Не держим соединение из пула, пока идет хеширование
+    await database.release(db)
 
-    hashed_pwd = auth.get_password_hash(user.password)
+    hashed_pwd = await auth.get_password_hash_async(user.password)
 
-    new_user = models.User(
-        email=user.email,
-        hashed_password=hashed_pwd
-    )
-
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    try:
+        new_user = await database.run(db, crud.create_user, user.email, hashed_pwd)
+    except IntegrityError:
+        # Тот же email успели зарегистрировать между проверкой и вставкой
+        raise HTTPException(
+            status_code=400,
+            detail="Email already registered"
+        )
 
-    access_token = auth.create_access_token(data={"sub": new_user.email})
+    access_token = auth.create_access_token(data={"sub": str(new_user.id), "email": new_user.email})
 
     return {
         "access_token": access_token,
@@ -38,19 +41,20 @@ def register_user(user: schemas.UserCreate, db: Session = Depends(database.get_d
 
 
 @router.post("/login", response_model=schemas.Token)
-def login_for_access_token(
+async def login_for_access_token(
         form_data: OAuth2PasswordRequestForm = Depends(),
         db: Session = Depends(database.get_db)
 ):
-    user = db.query(models.User).filter(models.User.email == form_data.username).first()
+    user = await database.run(db, crud.get_user_by_email, form_data.username)
+    await database.release(db)
 
-    if not user or not auth.verify_password(form_data.password, user.hashed_password):
+    if not user or not await auth.verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token = auth.create_access_token(data={"sub": user.email})
+    access_token = auth.create_access_token(data={"sub": str(user.id), "email": user.email})
 
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+    return {"access_token": access_token, "token_type": "bearer"}
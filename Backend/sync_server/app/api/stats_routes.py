@@ -0,0 +1,20 @@
+from datetime import date
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from .. import schemas, database, auth, crud
+
+router = APIRouter(prefix="/stats", tags=["Statistics"])
+
+
+@router.get("/daily", response_model=List[schemas.DailyStatsResponse])
+async def daily_stats(
+        date_from: date = Query(alias="from"),
+        date_to: date = Query(alias="to"),
+        db: Session = Depends(database.get_db),
+        current_user: schemas.CurrentUser = Depends(auth.get_current_user)
+):
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+
+    return await database.run(db, crud.select_daily_stats, current_user.id, date_from, date_to)
@@ -1,49 +1,89 @@
-from fastapi import APIRouter, Depends
+import json
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from .. import models, schemas, database, auth
+from .. import schemas, database, auth, crud
+from ..compression import GzipRoute
 from datetime import datetime, timezone
 
-router = APIRouter(prefix="/sync", tags=["Sync"])
+router = APIRouter(prefix="/sync", tags=["Sync"], route_class=GzipRoute)
 
 
-@router.post("/push")
-def push_tasks(
+@router.post("/push", response_model=schemas.PushResponse)
+async def push_tasks(
         sync_data: schemas.SyncData,
         db: Session = Depends(database.get_db),
-        current_user: models.User = Depends(auth.get_current_user)
+        current_user: schemas.CurrentUser = Depends(auth.get_current_user)
 ):
-    for task_in in sync_data.tasks:
-        db_task = db.query(models.Task).filter(
-            models.Task.id == task_in.id,
-            models.Task.user_id == current_user.id
-        ).first()
+    results = await database.run(db, crud.upsert_tasks, current_user.id, sync_data.tasks)
+    results += await database.run(db, crud.apply_task_patches, current_user.id, sync_data.changes)
+
+    return {
+        "status": "success",
+        "message": "Tasks synced",
+        "results": results
+    }
 
-        if not db_task:
-            new_task = models.Task(**task_in.model_dump(), user_id=current_user.id)
-            db.add(new_task)
-        else:
-            if task_in.updated_at > db_task.updated_at.replace(tzinfo=task_in.updated_at.tzinfo):
-                for key, value in task_in.model_dump().items():
-                    setattr(db_task, key, value)
 
-    db.commit()
-    return {"status": "success", "message": "Tasks synced"}
+PULL_PAGE_SIZE = 500
+PULL_MAX_PAGE_SIZE = 5000
 
 
 @router.get("/pull", response_model=schemas.PullResponse)
-def pull_tasks(
-        last_sync: str,
+async def pull_tasks(
+        request: Request,
+        last_sync: datetime,
+        cursor: Optional[str] = None,
+        delta: bool = False,
+        limit: int = Query(PULL_PAGE_SIZE, ge=1, le=PULL_MAX_PAGE_SIZE),
         db: Session = Depends(database.get_db),
-        current_user: models.User = Depends(auth.get_current_user)
+        current_user: schemas.CurrentUser = Depends(auth.get_current_user)
 ):
     current_server_time = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    last_sync = crud.to_naive_utc(last_sync)
+
+    if "application/x-ndjson" in request.headers.get("accept", ""):
+        return StreamingResponse(
+            _stream_tasks(current_user.id, last_sync, limit, delta, current_server_time),
+            media_type="application/x-ndjson"
+        )
 
-    tasks = db.query(models.Task).filter(
-        models.Task.user_id == current_user.id,
-        models.Task.updated_at > last_sync
-    ).all()
+    try:
+        tasks, next_cursor = await database.run(
+            db, crud.select_tasks_page, current_user.id, last_sync, cursor, limit
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    changes = []
+    if delta:
+        tasks, changes = await database.run(db, crud.split_task_changes, tasks, last_sync)
 
     return {
         "tasks": tasks,
-        "server_time": current_server_time
-    }
\ No newline at end of file
+        "changes": [change.model_dump(mode="json", exclude_unset=True) for change in changes],
+        "server_time": current_server_time,
+        "next_cursor": next_cursor
+    }
+
+
+def _stream_tasks(user_id, last_sync, limit, delta, server_time):
+    db = database.SessionLocal()
+    try:
+        cursor = None
+        while True:
+            tasks, cursor = crud.select_tasks_page(db, user_id, last_sync, cursor, limit)
+            changes = []
+            if delta:
+                tasks, changes = crud.split_task_changes(db, tasks, last_sync)
+            for task in tasks:
+                yield schemas.TaskResponse.model_validate(task).model_dump_json() + "\n"
+            for change in changes:
+                yield change.model_dump_json(exclude_unset=True) + "\n"
+            db.expunge_all()
+            if cursor is None:
+                break
+        yield json.dumps({"server_time": server_time}) + "\n"
+    finally:
+        db.close()
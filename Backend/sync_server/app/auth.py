@@ -1,11 +1,17 @@
+import asyncio
 import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from . import database, models
+from . import database, schemas, crud
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -13,6 +19,16 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 if not SECRET_KEY:
     raise RuntimeError("SECRET_KEY environment variable is required. Set it in .env file or environment.")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL_SECONDS", "300"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "4096"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", str(PASSWORD_HASH_WORKERS * 16)))
+
+_user_cache = OrderedDict()
+_user_cache_lock = threading.Lock()
+
+_hash_pool = None
+_hash_queue_depth = 0
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
@@ -20,6 +36,48 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+
+def _lower_priority():
+    # Хеширование не должно отнимать CPU у запросов /sync/*
+    if hasattr(os, "nice"):
+        os.nice(10)
+
+
+def hash_queue_depth() -> int:
+    return _hash_queue_depth
+
+
+async def _run_in_hash_pool(func, *args):
+    global _hash_pool, _hash_queue_depth
+    if _hash_queue_depth >= PASSWORD_HASH_QUEUE_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many authentication requests, try again later",
+            headers={"Retry-After": "1"},
+        )
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, initializer=_lower_priority)
+
+    _hash_queue_depth += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_pool, func, *args)
+    finally:
+        _hash_queue_depth -= 1
+
+
+async def verify_password_async(plain_password, hashed_password):
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await _run_in_hash_pool(get_password_hash, password)
+
+
+def shutdown_hash_pool():
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=False, cancel_futures=True)
+        _hash_pool = None
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(days=30)
@@ -31,7 +89,33 @@ def create_access_token(data: dict):
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
+def _cache_get(token: str):
+    with _user_cache_lock:
+        entry = _user_cache.get(token)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            del _user_cache[token]
+            return None
+        _user_cache.move_to_end(token)
+        return user
+
+
+def _cache_put(token: str, user: schemas.CurrentUser, token_exp: float):
+    ttl = min(USER_CACHE_TTL, token_exp - time.time())
+    with _user_cache_lock:
+        _user_cache[token] = (time.monotonic() + ttl, user)
+        _user_cache.move_to_end(token)
+        while len(_user_cache) > USER_CACHE_SIZE:
+            _user_cache.popitem(last=False)
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
+    cached = _cache_get(token)
+    if cached is not None:
+        return cached
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -39,13 +123,22 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     )
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+        subject: str = payload.get("sub")
+        if subject is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
 
-    user = db.query(models.User).filter(models.User.email == email).first()
+    try:
+        user_id = uuid.UUID(subject)
+    except ValueError:
+        # Токены, выданные до перехода на id в sub, содержат email
+        user = await database.run(db, crud.get_user_by_email, subject)
+    else:
+        user = await database.run(db, crud.get_user, user_id)
     if user is None:
         raise credentials_exception
-    return user
\ No newline at end of file
+
+    current_user = schemas.CurrentUser(id=user.id, email=user.email)
+    _cache_put(token, current_user, payload["exp"])
+    return current_user
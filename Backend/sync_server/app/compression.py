@@ -0,0 +1,51 @@
+import os
+import zlib
+from typing import Callable
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1024"))
+MAX_REQUEST_BODY_BYTES = int(os.getenv("MAX_REQUEST_BODY_BYTES", str(64 * 1024 * 1024)))
+
+# Кодировки тел запросов, которые сервер умеет распаковывать (RFC 7694)
+REQUEST_ENCODINGS = "gzip"
+
+
+class GzipRequest(Request):
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            body = await super().body()
+            encoding = self.headers.get("content-encoding", "identity").lower()
+            if encoding == "gzip":
+                body = _gunzip(body)
+            elif encoding != "identity":
+                raise HTTPException(
+                    status_code=415,
+                    detail=f"Unsupported Content-Encoding: {encoding}",
+                    headers={"Accept-Encoding": REQUEST_ENCODINGS}
+                )
+            self._body = body
+        return self._body
+
+
+class GzipRoute(APIRoute):
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            response = await original_route_handler(GzipRequest(request.scope, request.receive))
+            response.headers["Accept-Encoding"] = REQUEST_ENCODINGS
+            return response
+
+        return route_handler
+
+
+def _gunzip(body: bytes) -> bytes:
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        data = decompressor.decompress(body, MAX_REQUEST_BODY_BYTES)
+    except zlib.error:
+        raise HTTPException(status_code=400, detail="Malformed gzip body")
+    if decompressor.unconsumed_tail:
+        raise HTTPException(status_code=413, detail="Request body too large")
+    return data
@@ -0,0 +1,273 @@
+import base64
+from datetime import date, datetime, timezone
+from sqlalchemy import and_, func, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from . import models, schemas
+
+PUSH_CHUNK_SIZE = 500
+
+STATUS_COUNTERS = {
+    "underway": "in_progress_tasks",
+    "overdue": "overdue_tasks",
+}
+
+
+def get_user(db: Session, user_id):
+    return db.get(models.User, user_id)
+
+
+def get_user_by_email(db: Session, email: str):
+    return db.query(models.User).filter(models.User.email == email).first()
+
+
+def create_user(db: Session, email: str, hashed_password: str):
+    new_user = models.User(
+        email=email,
+        hashed_password=hashed_password
+    )
+
+    db.add(new_user)
+    db.commit()
+    db.refresh(new_user)
+    return new_user
+
+
+def upsert_tasks(db: Session, user_id, tasks_in: list[schemas.TaskCreate]):
+    results = []
+    if not tasks_in:
+        return results
+
+    stats = get_daily_stats_for_update(db, user_id, datetime.now(timezone.utc).date())
+
+    for start in range(0, len(tasks_in), PUSH_CHUNK_SIZE):
+        chunk = tasks_in[start:start + PUSH_CHUNK_SIZE]
+        ids = {task_in.id for task_in in chunk}
+        replaced = []
+
+        existing = {
+            task.id: task
+            for task in db.query(models.Task).filter(
+                models.Task.user_id == user_id,
+                models.Task.id.in_(ids)
+            ).all()
+        }
+
+        for task_in in chunk:
+            db_task = existing.get(task_in.id)
+
+            if not db_task:
+                db_task = models.Task(**task_in.model_dump(), user_id=user_id)
+                db.add(db_task)
+                existing[task_in.id] = db_task
+                apply_status_change(stats, None, task_in.status)
+                results.append({"id": task_in.id, "accepted": True})
+            elif task_in.updated_at > db_task.updated_at.replace(tzinfo=task_in.updated_at.tzinfo):
+                apply_status_change(stats, db_task.status, task_in.status)
+                for key, value in task_in.model_dump().items():
+                    setattr(db_task, key, value)
+                replaced.append(task_in.id)
+                results.append({"id": task_in.id, "accepted": True})
+            else:
+                results.append({"id": task_in.id, "accepted": False})
+
+        # После полной записи версии полей снова определяются updated_at задачи
+        if replaced:
+            db.query(models.TaskFieldVersion).filter(
+                models.TaskFieldVersion.task_id.in_(replaced)
+            ).delete(synchronize_session=False)
+        db.flush()
+
+    db.commit()
+    return results
+
+
+def apply_task_patches(db: Session, user_id, patches: list[schemas.TaskPatch]):
+    results = []
+    if not patches:
+        return results
+
+    stats = get_daily_stats_for_update(db, user_id, datetime.now(timezone.utc).date())
+
+    for start in range(0, len(patches), PUSH_CHUNK_SIZE):
+        chunk = patches[start:start + PUSH_CHUNK_SIZE]
+        ids = {patch.id for patch in chunk}
+
+        existing = {
+            task.id: task
+            for task in db.query(models.Task).filter(
+                models.Task.user_id == user_id,
+                models.Task.id.in_(ids)
+            ).all()
+        }
+        versions = select_field_versions(db, ids)
+
+        for patch in chunk:
+            db_task = existing.get(patch.id)
+            if not db_task:
+                results.append({"id": patch.id, "accepted": False})
+                continue
+
+            patch_time = to_naive_utc(patch.updated_at)
+            task_versions = versions.setdefault(patch.id, {})
+            if not task_versions:
+                task_versions["*"] = models.TaskFieldVersion(task_id=patch.id, field="*", updated_at=db_task.updated_at)
+                db.add(task_versions["*"])
+
+            accepted = False
+            for field, value in patch.model_dump(exclude_unset=True, exclude={"id", "updated_at"}).items():
+                version = task_versions.get(field)
+                if patch_time <= (version or task_versions["*"]).updated_at:
+                    continue
+
+                if field == "status":
+                    apply_status_change(stats, db_task.status, value)
+                setattr(db_task, field, value)
+
+                if version:
+                    version.updated_at = patch_time
+                else:
+                    task_versions[field] = models.TaskFieldVersion(task_id=patch.id, field=field, updated_at=patch_time)
+                    db.add(task_versions[field])
+                accepted = True
+
+            if accepted and patch_time > db_task.updated_at:
+                db_task.updated_at = patch_time
+            results.append({"id": patch.id, "accepted": accepted})
+
+        db.flush()
+
+    db.commit()
+    return results
+
+
+def select_field_versions(db: Session, task_ids):
+    versions = {}
+    for version in db.query(models.TaskFieldVersion).filter(models.TaskFieldVersion.task_id.in_(task_ids)).all():
+        versions.setdefault(version.task_id, {})[version.field] = version
+    return versions
+
+
+def split_task_changes(db: Session, tasks, last_sync):
+    if not tasks:
+        return [], []
+
+    versions = select_field_versions(db, [task.id for task in tasks])
+    full, changes = [], []
+    for task in tasks:
+        task_versions = versions.get(task.id)
+        if not task_versions or task_versions["*"].updated_at > last_sync:
+            full.append(task)
+            continue
+
+        fields = {
+            field: getattr(task, field)
+            for field, version in task_versions.items()
+            if field != "*" and version.updated_at > last_sync
+        }
+        changes.append(schemas.TaskPatch(id=task.id, updated_at=task.updated_at, **fields))
+    return full, changes
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def get_daily_stats_for_update(db: Session, user_id, day: date):
+    query = db.query(models.DailyStats).filter(
+        models.DailyStats.user_id == user_id,
+        models.DailyStats.date == day
+    ).with_for_update()
+    stats = query.first()
+    if stats:
+        return stats
+
+    # FOR UPDATE не блокирует строку, которой еще нет: параллельный первый push дня
+    # вставит ее раньше нас, поэтому вставка пропускает конфликт, а блокировку берем повторным SELECT
+    insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+    db.execute(
+        insert(models.DailyStats)
+        .values(user_id=user_id, date=day, completed_tasks=0, **_daily_stats_seed(db, user_id, day))
+        .on_conflict_do_nothing(index_elements=["user_id", "date"])
+    )
+    return query.one()
+
+
+def _daily_stats_seed(db: Session, user_id, day: date):
+    previous = db.query(models.DailyStats).filter(
+        models.DailyStats.user_id == user_id,
+        models.DailyStats.date < day
+    ).order_by(models.DailyStats.date.desc()).first()
+
+    if previous:
+        return {
+            "total_tasks": previous.total_tasks,
+            "overdue_tasks": previous.overdue_tasks,
+            "in_progress_tasks": previous.in_progress_tasks,
+        }
+
+    # Первая запись пользователя: один раз считаем по всей таблице задач
+    counts = dict(db.query(models.Task.status, func.count(models.Task.id)).filter(
+        models.Task.user_id == user_id
+    ).group_by(models.Task.status).all())
+    return {
+        "total_tasks": sum(counts.values()),
+        "overdue_tasks": counts.get("overdue", 0),
+        "in_progress_tasks": counts.get("underway", 0),
+    }
+
+
+def apply_status_change(stats: models.DailyStats, old_status, new_status):
+    if old_status is None:
+        stats.total_tasks += 1
+    if old_status == new_status:
+        return
+
+    if old_status in STATUS_COUNTERS:
+        setattr(stats, STATUS_COUNTERS[old_status], getattr(stats, STATUS_COUNTERS[old_status]) - 1)
+    if new_status in STATUS_COUNTERS:
+        setattr(stats, STATUS_COUNTERS[new_status], getattr(stats, STATUS_COUNTERS[new_status]) + 1)
+    if new_status == "completed":
+        stats.completed_tasks += 1
+    elif old_status == "completed":
+        # Задача могла быть завершена в прошлые дни, счетчик за сегодня не уходит в минус
+        stats.completed_tasks = max(stats.completed_tasks - 1, 0)
+
+
+def select_daily_stats(db: Session, user_id, date_from: date, date_to: date):
+    return db.query(models.DailyStats).filter(
+        models.DailyStats.user_id == user_id,
+        models.DailyStats.date >= date_from,
+        models.DailyStats.date <= date_to
+    ).order_by(models.DailyStats.date).all()
+
+
+def encode_cursor(task: models.Task) -> str:
+    raw = f"{task.updated_at.isoformat()}|{task.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    updated_at, task_id = raw.split("|", 1)
+    return datetime.fromisoformat(updated_at), task_id
+
+
+def select_tasks_page(db: Session, user_id, last_sync, cursor, limit: int):
+    query = db.query(models.Task).filter(models.Task.user_id == user_id)
+
+    if cursor:
+        cursor_updated_at, cursor_id = decode_cursor(cursor)
+        query = query.filter(models.Task.updated_at >= cursor_updated_at, or_(
+            models.Task.updated_at > cursor_updated_at,
+            and_(models.Task.updated_at == cursor_updated_at, models.Task.id > cursor_id)
+        ))
+    else:
+        query = query.filter(models.Task.updated_at > last_sync)
+
+    tasks = query.order_by(models.Task.updated_at, models.Task.id).limit(limit + 1).all()
+
+    next_cursor = encode_cursor(tasks[limit - 1]) if len(tasks) > limit else None
+    return tasks[:limit], next_cursor
@@ -1,16 +1,22 @@
 from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
 from .database import engine, Base, SessionLocal
-from .models import User, Task, TaskType
-from .api import auth_routes, sync_routes
+from .models import User, Task, TaskType, DailyStats
+from .api import auth_routes, sync_routes, stats_routes
+from . import auth, compression
 
 app = FastAPI(title="ProductivitySync Server")
+app.add_middleware(GZipMiddleware, minimum_size=compression.GZIP_MINIMUM_SIZE)
 
 app.include_router(auth_routes.router)
 app.include_router(sync_routes.router)
+app.include_router(stats_routes.router)
 
 @app.on_event("startup")
 def startup():
     Base.metadata.create_all(bind=engine)
+    for index in Task.__table__.indexes | DailyStats.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
     session = SessionLocal()
     try:
         count = session.query(TaskType).count()
@@ -29,6 +35,10 @@ def startup():
     finally:
         session.close()
 
+@app.on_event("shutdown")
+def shutdown():
+    auth.shutdown_hash_pool()
+
 @app.get("/")
 def read_root():
-    return {"status": "online"}
\ No newline at end of file
+    return {"status": "online", "password_hash_queue_depth": auth.hash_queue_depth()}
\ No newline at end of file
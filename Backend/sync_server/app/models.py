@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Boolean, Date
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Boolean, Date, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
@@ -28,6 +28,9 @@ class TaskType(Base):
 
 class DailyStats(Base):
     __tablename__ = "daily_stats"
+    __table_args__ = (
+        Index("ix_daily_stats_user_id_date", "user_id", "date", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -41,6 +44,9 @@ class DailyStats(Base):
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        Index("ix_tasks_user_id_updated_at_id", "user_id", "updated_at", "id"),
+    )
 
     id = Column(String(36), primary_key=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
@@ -61,4 +67,13 @@ class Task(Base):
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
     owner = relationship("User", back_populates="tasks")
-    task_type = relationship("TaskType", back_populates="tasks")
\ No newline at end of file
+    task_type = relationship("TaskType", back_populates="tasks")
+
+
+class TaskFieldVersion(Base):
+    __tablename__ = "task_field_versions"
+
+    # field="*" хранит момент последней полной записи задачи
+    task_id = Column(String(36), ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    field = Column(String, primary_key=True)
+    updated_at = Column(DateTime, nullable=False)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List, Union
+from typing import Optional, List, Union, Dict, Any
 from datetime import datetime, date
 from uuid import UUID
 
@@ -38,8 +38,31 @@ class TaskResponse(TaskBase):
     class Config:
         from_attributes = True
 
+class TaskPatch(BaseModel):
+    id: str
+    updated_at: datetime
+    title: Optional[str] = None
+    description: Optional[str] = None
+    task_type_id: Optional[int] = None
+    personal_priority: Optional[int] = None
+    influence: Optional[int] = None
+    created_at: Optional[datetime] = None
+    deadline: Optional[datetime] = None
+    final_priority: Optional[str] = None
+    status: Optional[str] = None
+
 class SyncData(BaseModel):
-    tasks: List[TaskCreate]
+    tasks: List[TaskCreate] = []
+    changes: List[TaskPatch] = []
+
+class TaskPushResult(BaseModel):
+    id: str
+    accepted: bool
+
+class PushResponse(BaseModel):
+    status: str
+    message: str
+    results: List[TaskPushResult]
 
 class Token(BaseModel):
     access_token: str
@@ -48,6 +71,22 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     email: Optional[str] = None
 
+class CurrentUser(BaseModel):
+    id: UUID
+    email: str
+
+class DailyStatsResponse(BaseModel):
+    date: date
+    total_tasks: int
+    completed_tasks: int
+    overdue_tasks: int
+    in_progress_tasks: int
+
+    class Config:
+        from_attributes = True
+
 class PullResponse(BaseModel):
     tasks: List[TaskResponse]
-    server_time: str
\ No newline at end of file
+    changes: List[Dict[str, Any]] = []
+    server_time: str
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,79 @@
+"""Постраничный /sync/pull: индекс (user_id, updated_at, id) против таблицы без него.
+
+    python bench/bench_pull.py --tasks 10000 100000 1000000
+
+Без DATABASE_URL база создается во временном файле SQLite; с ним бенчмарк пишет в указанную базу
+и пересоздает в ней таблицы.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'server.db')}")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+
+from app import crud, models
+from app.database import Base, SessionLocal, engine
+
+INDEX = next(index for index in models.Task.__table__.indexes if index.name == "ix_tasks_user_id_updated_at_id")
+START = datetime(2025, 1, 1)
+
+
+def fill(tasks, users):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    user_ids = [uuid.uuid4() for _ in range(users)]
+    with engine.begin() as connection:
+        connection.execute(insert(models.User), [
+            {"id": user_id, "email": f"user{i}@example.com", "hashed_password": "x"} for i, user_id in enumerate(user_ids)
+        ])
+        for start in range(0, tasks, 50000):
+            connection.execute(insert(models.Task), [
+                {"id": str(uuid.uuid4()), "user_id": user_ids[i % users], "title": f"task {i}", "status": "underway",
+                 # Несколько задач на одну секунду - курсору нужен id для разрешения равенства
+                 "updated_at": START + timedelta(seconds=i // 3)}
+                for i in range(start, min(start + 50000, tasks))
+            ])
+    return user_ids[0]
+
+
+def pull(user_id, last_sync, limit):
+    # Тот же обход, что у клиента: страницы по курсору, пока сервер его возвращает
+    pages, received, cursor = [], 0, None
+    with SessionLocal() as db:
+        while True:
+            started = time.perf_counter()
+            tasks, cursor = crud.select_tasks_page(db, user_id, last_sync, cursor, limit)
+            pages.append(time.perf_counter() - started)
+            received += len(tasks)
+            if not cursor:
+                return received, pages
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--limit", type=int, default=500)
+    args = parser.parse_args()
+
+    for tasks in args.tasks:
+        user_id = fill(tasks, args.users)
+        # Клиент, синхронизировавшийся на середине истории
+        last_sync = START + timedelta(seconds=tasks // 6)
+        for label in ("index", "no index"):
+            if label == "no index":
+                INDEX.drop(bind=engine)
+            received, pages = pull(user_id, last_sync, args.limit)
+            print(f"tasks: {tasks}, {label}: {received} rows in {len(pages)} pages, total {sum(pages) * 1000:.0f} ms, "
+                  f"first page {pages[0] * 1000:.1f} ms, last page {pages[-1] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# database.py читает DATABASE_URL при импорте, поэтому тесты подменяют его до импорта app.
+# Адрес из окружения (.env, контейнер api) не используется: фикстура db пересоздает таблицы
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'server.db')}"
+os.environ["DATABASE_ASYNC"] = "false"
+os.environ.setdefault("SECRET_KEY", "test-secret-key-test-secret-key!")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import Base, SessionLocal, engine
+from app import models
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def user(db):
+    user = models.User(email="user@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
@@ -0,0 +1,28 @@
+from fastapi.testclient import TestClient
+
+from app import crud, models
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_register_rejects_existing_email(db, user):
+    response = client.post("/auth/register", json={"email": user.email, "password": "secret123"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already registered"
+
+
+def test_register_race_on_same_email_returns_400(db, user, monkeypatch):
+    # Второй запрос прошел проверку до того, как первый вставил пользователя
+    monkeypatch.setattr(crud, "get_user_by_email", lambda session, email: None)
+    response = client.post("/auth/register", json={"email": user.email, "password": "secret123"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already registered"
+    assert db.query(models.User).count() == 1
+
+
+def test_register_returns_token(db):
+    response = client.post("/auth/register", json={"email": "new@example.com", "password": "secret123"})
+    assert response.status_code == 200
+    assert response.json()["token_type"] == "bearer"
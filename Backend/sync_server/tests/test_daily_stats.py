@@ -0,0 +1,54 @@
+from datetime import date
+
+from app import crud, models
+from app.database import SessionLocal
+
+DAY = date(2026, 3, 1)
+
+
+def test_first_push_of_day_survives_concurrent_insert(db, user, monkeypatch):
+    seed = crud._daily_stats_seed
+
+    def seed_after_concurrent_insert(session, user_id, day):
+        # Другой запрос успевает вставить строку дня между нашим SELECT и INSERT
+        other = SessionLocal()
+        other.add(models.DailyStats(user_id=user_id, date=day, total_tasks=7, completed_tasks=2,
+                                    overdue_tasks=1, in_progress_tasks=4))
+        other.commit()
+        other.close()
+        return seed(session, user_id, day)
+
+    monkeypatch.setattr(crud, "_daily_stats_seed", seed_after_concurrent_insert)
+    stats = crud.get_daily_stats_for_update(db, user.id, DAY)
+
+    assert (stats.total_tasks, stats.completed_tasks) == (7, 2)
+    assert db.query(models.DailyStats).count() == 1
+
+
+def test_new_row_is_seeded_from_previous_day(db, user):
+    db.add(models.DailyStats(user_id=user.id, date=date(2026, 2, 27), total_tasks=5, completed_tasks=3,
+                             overdue_tasks=1, in_progress_tasks=1))
+    db.commit()
+
+    stats = crud.get_daily_stats_for_update(db, user.id, DAY)
+
+    assert (stats.total_tasks, stats.completed_tasks, stats.overdue_tasks, stats.in_progress_tasks) == (5, 0, 1, 1)
+
+
+def test_reopening_completed_task_moves_counters_back(db, user):
+    stats = crud.get_daily_stats_for_update(db, user.id, DAY)
+
+    crud.apply_status_change(stats, None, "underway")
+    crud.apply_status_change(stats, "underway", "completed")
+    assert (stats.in_progress_tasks, stats.completed_tasks) == (0, 1)
+
+    crud.apply_status_change(stats, "completed", "underway")
+    assert (stats.total_tasks, stats.in_progress_tasks, stats.completed_tasks) == (1, 1, 0)
+
+
+def test_reopening_task_completed_earlier_keeps_counter_non_negative(db, user):
+    stats = crud.get_daily_stats_for_update(db, user.id, DAY)
+
+    crud.apply_status_change(stats, "completed", "overdue")
+
+    assert (stats.completed_tasks, stats.overdue_tasks) == (0, 1)
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+from app import crud, models, schemas
+
+T0 = datetime(2026, 3, 1, 12, 0)
+TASK_ID = "00000000-0000-0000-0000-000000000001"
+
+
+def at(minutes):
+    return T0 + timedelta(minutes=minutes)
+
+
+def full_task(updated_at, **fields):
+    values = dict(id=TASK_ID, title="task", description="desc", task_type_id=1, personal_priority=1, influence=1,
+                  created_at=T0, deadline=at(60 * 24), final_priority="Mid", status="underway", updated_at=updated_at)
+    return schemas.TaskCreate(**{**values, **fields})
+
+
+def patch(db, user, minutes, **fields):
+    result, = crud.apply_task_patches(db, user.id, [schemas.TaskPatch(id=TASK_ID, updated_at=at(minutes), **fields)])
+    return result["accepted"]
+
+
+def task(db):
+    db.expire_all()
+    return db.get(models.Task, TASK_ID)
+
+
+def test_field_keeps_newest_patch(db, user):
+    crud.upsert_tasks(db, user.id, [full_task(at(0))])
+
+    assert patch(db, user, 20, title="newer")
+    assert not patch(db, user, 10, title="older")
+    # Другое поле той же задачи сравнивается со своей версией, а не с чужой
+    assert patch(db, user, 10, description="other field")
+    assert not patch(db, user, -10, final_priority="High")
+
+    stored = task(db)
+    assert (stored.title, stored.description, stored.final_priority) == ("newer", "other field", "Mid")
+    assert stored.updated_at == at(20)
+
+
+def test_full_write_resets_field_versions(db, user):
+    crud.upsert_tasks(db, user.id, [full_task(at(0))])
+    patch(db, user, 20, title="patched")
+
+    crud.upsert_tasks(db, user.id, [full_task(at(30), title="full")])
+    assert db.query(models.TaskFieldVersion).count() == 0
+    # Версия "*" снова берется из updated_at полной записи
+    assert not patch(db, user, 25, title="older than full")
+    assert patch(db, user, 40, description="after full")
+
+    stored = task(db)
+    assert (stored.title, stored.description) == ("full", "after full")
+
+
+def test_delta_pull_returns_only_changed_fields(db, user):
+    crud.upsert_tasks(db, user.id, [full_task(at(0))])
+    patch(db, user, 20, title="patched", status="completed")
+
+    full, changes = crud.split_task_changes(db, [task(db)], at(10))
+    assert full == []
+    assert changes[0].model_dump(exclude_unset=True) == {
+        "id": TASK_ID, "updated_at": at(20), "title": "patched", "status": "completed"
+    }
+
+    # Клиент, не видевший полной записи задачи, получает ее целиком
+    full, changes = crud.split_task_changes(db, [task(db)], at(-10))
+    assert [t.id for t in full] == [TASK_ID] and changes == []
+
+
+def test_task_without_patches_is_sent_whole(db, user):
+    crud.upsert_tasks(db, user.id, [full_task(at(0))])
+
+    full, changes = crud.split_task_changes(db, [task(db)], at(10))
+    assert [t.id for t in full] == [TASK_ID] and changes == []
@@ -1,10 +1,22 @@
 import requests
 from PyQt6.QtCore import QSettings
 from datetime import datetime, timezone
-from local_db.models import Task, TaskType
-from local_db.data_manager import Session
+from local_db.models import Task, TaskType, TaskChange
+from local_db.data_manager import Session, TASK_SYNC_FIELDS
+from sqlalchemy import bindparam, delete, exists, or_, select
+import gzip
 import json
 import os
+import time
+
+
+MERGE_FIELDS = ['title', 'description', 'task_type_id', 'personal_priority',
+                'influence', 'status', 'final_priority', 'deadline']
+SYNC_PHASES = ['push', 'pull', 'merge']
+
+
+class SyncCancelled(Exception):
+    pass
 
 
 class SyncService:
@@ -18,13 +30,37 @@ class SyncService:
                 config = json.load(f)
             self.url = f"{config.get('server_url', 'http://localhost:8000')}/sync"
         except FileNotFoundError:
+            config = {}
             self.url = "http://localhost:8000/sync"
             print(f"WARNING: config.json not found, using default URL: {self.url}")
 
+        self.timeout = config.get('timeout_seconds', 30)
+        self.retry_attempts = config.get('retry_attempts', 3)
+        self.push_chunk_size = config.get('push_chunk_size', 500)
+        self.pull_page_size = config.get('pull_page_size', 500)
+        self.pull_stream = config.get('pull_stream', False)
+        self.compress_min_bytes = config.get('compress_min_bytes', 1024)
+        # Сжимаем тела запросов только после того, как сервер объявил поддержку gzip
+        self.gzip_requests = False
+
+        self.http = requests.Session()
+        self.http.headers.update(self.headers)
+
         self.settings = QSettings("MyCompany", "SPS")
+        self.timings = {}
+        self.merged_ids = {}
+        self.progress = None
+        self.cancelled = None
 
-    def run_sync(self):
-        session = Session()
+    def run_sync(self, progress=None, cancelled=None):
+        # progress получает текст текущего шага, cancelled опрашивается между запросами:
+        # так синхронизацию можно вести и отменять из фонового потока
+        self.progress = progress
+        self.cancelled = cancelled
+        self.timings = dict.fromkeys(SYNC_PHASES, 0.0)
+        # id задач, которые слияние уже записало в базу, - даже если синхронизация потом упала
+        self.merged_ids = {}
+        session = Session(info={"sync": True})
         tasks_count = session.query(Task).count()
 
         if tasks_count == 0:
@@ -32,51 +68,72 @@ class SyncService:
         else:
             last_sync = str(self.settings.value("last_sync_time", "2000-01-01T00:00:00Z"))
         try:
+            started = time.perf_counter()
             last_sync_dt = datetime.fromisoformat(last_sync.replace('Z', '+00:00'))
-            local_updates = session.query(Task).filter(Task.updated_at > last_sync_dt).all()
+            pending = {}
+            for change in session.query(TaskChange).all():
+                pending.setdefault(change.task_id, set()).add(change.field)
+            # Несинхронизированные правки определяет task_changes: правка, сделанная во время прошлой
+            # синхронизации, старше ее server_time и фильтр по updated_at ее бы пропустил
+            local_updates = session.query(Task).filter(
+                or_(Task.updated_at > last_sync_dt, Task.id.in_(select(TaskChange.task_id)))
+            ).all()
 
+            # Задачи без записанных изменений и новые задачи уходят целиком
+            items = []
             for task in local_updates:
-                task_data = {
-                    "id": task.id,
-                    "title": task.title,
-                    "description": task.description,
-                    "task_type_id": task.task_type_id,
-                    "personal_priority": task.personal_priority,
-                    "influence": task.influence,
-                    "status": task.status,
-                    "deadline": task.deadline.isoformat() if task.deadline else None,
-                    "created_at": task.created_at.isoformat() if task.created_at else datetime.now(timezone.utc).isoformat(),
-                    "updated_at": task.updated_at.isoformat(),
-                    "final_priority": task.final_priority
-                }
+                fields = pending.get(task.id)
+                if not fields or "*" in fields:
+                    items.append(("tasks", self._serialize_task(task, TASK_SYNC_FIELDS)))
+                else:
+                    items.append(("changes", self._serialize_task(task, [f for f in TASK_SYNC_FIELDS if f in fields])))
+            sent_versions = {task.id: task.updated_at for task in local_updates}
+            # Снимок готов; читающая транзакция не должна мешать правкам из окна во время отправки
+            session.commit()
 
-                full_payload = {"tasks": [task_data]}
+            for start in range(0, len(items), self.push_chunk_size):
+                self._check_cancelled()
+                self._report(f"Отправка изменений: {start}/{len(items)}")
+                chunk = items[start:start + self.push_chunk_size]
+                full_payload = {
+                    "tasks": [data for kind, data in chunk if kind == "tasks"],
+                    "changes": [data for kind, data in chunk if kind == "changes"]
+                }
 
-                resp = requests.post(f"{self.url}/push", json=full_payload, headers=self.headers)
+                resp = self._push_chunk(full_payload)
                 if resp.status_code == 422:
                     print("!!! ОШИБКА ВАЛИДАЦИИ (422) !!!")
                     print(f"Отправленный payload: {full_payload}")
                     print(f"Что ответил сервер: {resp.json()}")
                     return False, "Ошибка валидации данных на сервере"
+                resp.raise_for_status()
 
-            response = requests.get(f"{self.url}/pull", params={"last_sync": last_sync}, headers=self.headers)
-
-            if response.status_code == 200:
-                data = response.json()
+                rejected = [r["id"] for r in resp.json().get("results", []) if not r["accepted"]]
+                if rejected:
+                    print(f"DEBUG: Сервер оставил свою версию для {len(rejected)} задач")
 
-                remote_tasks = data.get("tasks", [])
-                print(f"DEBUG: Получено задач от сервера: {len(remote_tasks)}")
-                for r_task in remote_tasks:
-                    self._merge_task(session, r_task)
+                self._forget_sent_changes(session, [data["id"] for kind, data in chunk], sent_versions)
+                session.commit()
+            self.timings["push"] = time.perf_counter() - started
 
-                new_sync_time = data.get("server_time")
-                if new_sync_time:
-                    self.settings.setValue("last_sync_time", new_sync_time)
-                    print(f"✅ Sync time updated to server time: {new_sync_time}")
+            started = time.perf_counter()
+            try:
+                new_sync_time = self._pull(session, last_sync)
+            finally:
+                # Слияние идет постранично вперемешку с загрузкой, его время считает _merge_page
+                self.timings["pull"] = time.perf_counter() - started - self.timings["merge"]
 
             session.commit()
+
+            if new_sync_time:
+                self.settings.setValue("last_sync_time", new_sync_time)
+                print(f"✅ Sync time updated to server time: {new_sync_time}")
             return True, "Синхронизация завершена"
 
+        except SyncCancelled:
+            session.rollback()
+            print("⚠️ Синхронизация отменена")
+            return False, "Синхронизация отменена"
         except Exception as e:
             session.rollback()
             print(f"❌ Sync error: {e}")
@@ -84,21 +141,156 @@ class SyncService:
         finally:
             session.close()
 
+    def _forget_sent_changes(self, session, task_ids, sent_versions):
+        # Записи об изменениях удаляем только у задач, которые не правили после снимка:
+        # правка во время отправки сдвинула updated_at и уйдет следующей синхронизацией
+        tasks, changes = Task.__table__, TaskChange.__table__
+        session.execute(
+            delete(changes).where(
+                changes.c.task_id == bindparam("sent_id"),
+                exists().where(tasks.c.id == bindparam("sent_id"), tasks.c.updated_at == bindparam("sent_at"))
+            ),
+            [{"sent_id": task_id, "sent_at": sent_versions[task_id]} for task_id in task_ids]
+        )
+
+    def _report(self, message):
+        if self.progress:
+            self.progress(message)
+
+    def _check_cancelled(self):
+        # Отмена срабатывает между запросами: уже отправленные пачки и слитые страницы
+        # закоммичены, а last_sync_time не сдвигается, так что следующий запуск дочитает остальное
+        if self.cancelled and self.cancelled():
+            raise SyncCancelled()
+
+    def _serialize_task(self, task, fields):
+        data = {"id": task.id, "updated_at": task.updated_at.isoformat()}
+        for field in fields:
+            value = getattr(task, field)
+            if field == "created_at" and value is None:
+                value = datetime.now(timezone.utc)
+            data[field] = value.isoformat() if isinstance(value, datetime) else value
+        return data
+
+    def _encode_payload(self, payload):
+        body = json.dumps(payload).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self.gzip_requests and len(body) >= self.compress_min_bytes:
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+        return body, headers
+
+    def _check_request_encoding(self, response):
+        # Поддержку сжатия запоминаем по успешному ответу сервера; ответ с ошибкой может прийти
+        # от прокси без заголовка и не должен возвращать отправку без сжатия
+        if response.ok and "gzip" in response.headers.get("Accept-Encoding", ""):
+            self.gzip_requests = True
+
+    def _push_chunk(self, payload):
+        for attempt in range(1, self.retry_attempts + 1):
+            try:
+                body, headers = self._encode_payload(payload)
+                resp = self.http.post(f"{self.url}/push", data=body, headers=headers, timeout=self.timeout)
+                self._check_request_encoding(resp)
+                if resp.status_code < 500 or attempt == self.retry_attempts:
+                    return resp
+                print(f"WARNING: push вернул {resp.status_code}, попытка {attempt}/{self.retry_attempts}")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == self.retry_attempts:
+                    raise
+                print(f"WARNING: push не удался ({e}), попытка {attempt}/{self.retry_attempts}")
+            time.sleep(2 ** (attempt - 1))
+
+    def _pull(self, session, last_sync):
+        if self.pull_stream:
+            return self._pull_stream(session, last_sync)
+
+        server_time = None
+        cursor = None
+        received = 0
+        while True:
+            self._check_cancelled()
+            params = {"last_sync": last_sync, "limit": self.pull_page_size, "delta": "true"}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.http.get(f"{self.url}/pull", params=params, timeout=self.timeout)
+            response.raise_for_status()
+            self._check_request_encoding(response)
+            data = response.json()
+
+            # Первая страница определяет момент, с которого начнется следующая синхронизация
+            if server_time is None:
+                server_time = data.get("server_time")
+
+            remote_tasks = data.get("tasks", []) + data.get("changes", [])
+            self._merge_page(session, remote_tasks)
+            received += len(remote_tasks)
+            self._report(f"Получено задач: {received}")
+
+            cursor = data.get("next_cursor")
+            if not cursor:
+                break
+
+        print(f"DEBUG: Получено задач от сервера: {received}")
+        return server_time
+
+    def _pull_stream(self, session, last_sync):
+        server_time = None
+        page = []
+        received = 0
+        with self.http.get(f"{self.url}/pull", params={"last_sync": last_sync, "limit": self.pull_page_size, "delta": "true"},
+                           headers={"Accept": "application/x-ndjson"}, stream=True,
+                           timeout=self.timeout) as response:
+            response.raise_for_status()
+            self._check_request_encoding(response)
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                item = json.loads(line)
+                if "server_time" in item:
+                    server_time = item["server_time"]
+                    continue
+                page.append(item)
+                if len(page) >= self.pull_page_size:
+                    self._merge_page(session, page)
+                    received += len(page)
+                    page = []
+                    self._report(f"Получено задач: {received}")
+                    self._check_cancelled()
+
+        if page:
+            self._merge_page(session, page)
+            received += len(page)
+
+        print(f"DEBUG: Получено задач от сервера: {received}")
+        return server_time
+
+    def _merge_page(self, session, remote_tasks):
+        if not remote_tasks:
+            return
+        started = time.perf_counter()
+        local_tasks = {
+            task.id: task
+            for task in session.query(Task).filter(Task.id.in_([r_task['id'] for r_task in remote_tasks])).all()
+        }
+        merged = [r_task['id'] for r_task in remote_tasks if self._merge_task(session, r_task, local_tasks.get(r_task['id']))]
+        session.commit()
+        self.merged_ids.update(dict.fromkeys(merged))
+        self.timings["merge"] += time.perf_counter() - started
+
     def _parse_dt(self, dt_str):
         if not dt_str:
             return None
         iso_str = dt_str.replace(" ", "T").replace("Z", "+00:00")
         return datetime.fromisoformat(iso_str)
 
-    def _merge_task(self, session, r_task):
+    def _merge_task(self, session, r_task, local_task):
         try:
             r_updated = self._parse_dt(r_task.get('updated_at')).replace(tzinfo=None)
-            r_created = self._parse_dt(r_task.get('created_at')).replace(tzinfo=None)
-            r_deadline = self._parse_dt(r_task.get('deadline'))
-
-            local_task = session.query(Task).filter_by(id=r_task['id']).first()
-
             if not local_task:
+                if 'title' not in r_task:
+                    print(f"DEBUG: Изменения для неизвестной задачи {r_task['id']}, пропускаем")
+                    return
                 print(f"DEBUG: Пытаюсь добавить задачу: {r_task['title']}")
                 new_task = Task(
                     id=r_task['id'],
@@ -109,30 +301,30 @@ class SyncService:
                     influence=r_task.get('influence', 0),
                     status=r_task.get('status', 'underway'),
                     final_priority=r_task.get('final_priority', 'Mid'),
-                    created_at=r_created,
+                    created_at=self._parse_dt(r_task.get('created_at')).replace(tzinfo=None),
                     updated_at=r_updated,
-                    deadline=r_deadline
+                    deadline=self._parse_dt(r_task.get('deadline'))
                 )
                 session.add(new_task)
                 print(f"✅ DEBUG: Задача {r_task['title']} успешно добавлена в сессию")
+                return True
             else:
                 l_updated = local_task.updated_at
 
-                if r_updated > l_updated:
-                    print(f"DEBUG: Обновление существующей задачи: {r_task['title']}")
-                    print(f"DEBUG: Старый статус: {local_task.status}, Новый: {r_task.get('status')}")
-
-                    local_task.title = r_task.get('title')
-                    local_task.description = r_task.get('description')
-                    local_task.task_type_id = r_task.get('task_type_id')
-                    local_task.personal_priority = r_task.get('personal_priority')
-                    local_task.influence = r_task.get('influence')
-                    local_task.status = r_task.get('status')
-                    local_task.final_priority = r_task.get('final_priority')
-                    local_task.deadline = r_deadline
+                # Равное время означает, что сервер уже слил наши изменения с чужими
+                if r_updated >= l_updated:
+                    print(f"DEBUG: Обновление существующей задачи: {local_task.title}")
+                    print(f"DEBUG: Старый статус: {local_task.status}, Новый: {r_task.get('status', local_task.status)}")
+
+                    # Применяем только пришедшие поля: сервер может прислать частичные изменения
+                    for field in MERGE_FIELDS:
+                        if field in r_task:
+                            value = r_task[field]
+                            setattr(local_task, field, self._parse_dt(value) if field == 'deadline' else value)
                     local_task.updated_at = r_updated
+                    return True
                 else:
-                    print(f"DEBUG: Задача {r_task['title']} на ПК новее или такая же, пропускаем.")
+                    print(f"DEBUG: Задача {local_task.title} на ПК новее, пропускаем.")
 
         except Exception as e:
             print(f"❌ DEBUG: Ошибка в _merge_task для задачи {r_task.get('title')}: {e}")
\ No newline at end of file
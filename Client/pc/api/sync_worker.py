@@ -0,0 +1,101 @@
+from PyQt6.QtCore import QObject, QThread, QCoreApplication, pyqtSignal
+
+from api.sync_service import SyncService
+
+# Сколько поток GUI ждет остановки синхронизации при выходе из аккаунта или закрытии
+STOP_TIMEOUT_MS = 2000
+
+
+class SyncWorker(QThread):
+    progress = pyqtSignal(str)
+
+    def __init__(self, service):
+        super().__init__()
+        self.service = service
+        self.result = (False, "Синхронизация не запускалась")
+
+    def run(self):
+        self.result = self.service.run_sync(progress=self.progress.emit,
+                                            cancelled=self.isInterruptionRequested)
+
+
+class SyncController(QObject):
+    # Одна синхронизация за раз: запуск по кнопке во время синхронизации по таймеру
+    # присоединяется к ней, а не ставит вторую в очередь
+    started = pyqtSignal()
+    progress = pyqtSignal(str)
+    finished = pyqtSignal(bool, str, dict, list, bool)
+    # Последний брошенный stop() поток завершился и отпустил базу
+    stopped = pyqtSignal()
+
+    def __init__(self, token, parent=None):
+        super().__init__(parent)
+        self.service = SyncService(token=token)
+        self.worker = None
+        self.manual = False
+        # Потоки, не успевшие остановиться за STOP_TIMEOUT_MS: ссылка держит QThread до конца run
+        self._abandoned = []
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.stop)
+
+    def is_running(self):
+        return self.worker is not None
+
+    def start(self, manual=False, token=None):
+        self.manual = self.manual or manual
+        if self.worker is not None:
+            return False
+        if token and token != self.service.token:
+            self.service = SyncService(token=token)
+
+        self.worker = SyncWorker(self.service)
+        # Сигналы потока доставляются в поток GUI через очередь событий
+        self.worker.progress.connect(self.progress)
+        self.worker.finished.connect(self._on_finished)
+        self.worker.start()
+        self.started.emit()
+        return True
+
+    def cancel(self):
+        if self.worker is not None:
+            # Отмененную синхронизацию не нужно показывать диалогом
+            self.manual = False
+            self.worker.requestInterruption()
+
+    def stop(self):
+        # Перед выходом или удалением базы ждем, пока поток отпустит сессию, но не дольше
+        # STOP_TIMEOUT_MS: запрос, застрявший в повторах, не должен замораживать окно.
+        # False - поток еще работает, о его завершении сообщит сигнал stopped
+        if self.worker is None:
+            return not self._abandoned
+        worker = self.worker
+        worker.requestInterruption()
+        if worker.wait(STOP_TIMEOUT_MS):
+            return not self._abandoned
+        # Поток завершится сам на ближайшей проверке отмены; его результат уже никому не нужен
+        worker.progress.disconnect(self.progress)
+        worker.finished.disconnect(self._on_finished)
+        self.worker, self.manual = None, False
+        self._abandoned.append(worker)
+        worker.finished.connect(lambda: self._forget(worker))
+        if worker.isFinished():
+            self._forget(worker)
+        return not self._abandoned
+
+    def _forget(self, worker):
+        if worker in self._abandoned:
+            self._abandoned.remove(worker)
+            worker.deleteLater()
+            if not self._abandoned:
+                self.stopped.emit()
+
+    def _on_finished(self):
+        # finished брошенного потока мог встать в очередь до отключения сигнала
+        if self.sender() is not self.worker:
+            return
+        worker, manual = self.worker, self.manual
+        self.worker, self.manual = None, False
+        worker.deleteLater()
+        success, message = worker.result
+        self.finished.emit(success, message, dict(worker.service.timings), list(worker.service.merged_ids), manual)
@@ -0,0 +1,97 @@
+"""Признаки модели нагрузки: прежние пять запросов, один агрегирующий запрос и TaskStore в памяти.
+
+    python bench/bench_capacity.py --tasks 100000 --repeat 10
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import case, create_engine, func, insert, select
+
+from local_db import data_manager
+from local_db.models import Task
+from local_db.task_store import PRIORITY_RANK, TaskStore
+
+PRIORITY = case(*((Task.final_priority == name, rank) for name, rank in PRIORITY_RANK.items()))
+HOURS_TO_DEADLINE = (func.julianday(Task.deadline) - func.julianday(func.current_timestamp())) * 24
+
+
+def five_queries(session):
+    # Запросы select_capacity_parametrs до объединения; часы брались из первой строки, а не средним
+    underway = Task.status == "underway"
+    return (
+        session.execute(select(func.count(Task.title)).where(underway)).scalar(),
+        session.execute(select(func.avg(PRIORITY)).where(underway)).scalar(),
+        session.execute(select(func.max(PRIORITY)).where(underway)).scalar(),
+        session.execute(select(HOURS_TO_DEADLINE).where(underway)).scalar(),
+        session.execute(select(func.count(Task.title)).where(Task.status == "overdue")).scalar(),
+    )
+
+
+def one_query(session):
+    underway = Task.status == "underway"
+    return session.execute(select(
+        func.count(case((underway, 1))),
+        func.avg(case((underway, PRIORITY))),
+        func.max(case((underway, PRIORITY))),
+        func.avg(case((underway, HOURS_TO_DEADLINE))),
+        func.count(case((Task.status == "overdue", 1))),
+    ).where(Task.status.in_(("underway", "overdue")))).one()
+
+
+def measure(repeat, call):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = call()
+    return (time.perf_counter() - started) / repeat, tuple(result)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'SPS.db')}")
+    data_manager.Session.configure(bind=engine)
+    data_manager.engine = engine
+    data_manager._migrate_schema()
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    with engine.begin() as connection:
+        connection.execute(insert(Task), [
+            {"id": str(uuid.uuid4()), "title": f"task {i}", "description": "",
+             "deadline": now + timedelta(hours=rng.randint(-500, 2000)),
+             "status": rng.choice(("underway", "overdue", "completed")),
+             "final_priority": rng.choice(list(PRIORITY_RANK) + [None])}
+            for i in range(args.tasks)
+        ])
+
+    with data_manager.Session() as session:
+        results = {
+            "five queries": measure(args.repeat, lambda: five_queries(session)),
+            "one query": measure(args.repeat, lambda: one_query(session)),
+        }
+    started = time.perf_counter()
+    store = TaskStore()
+    store.reload()
+    loaded = time.perf_counter() - started
+    results["TaskStore"] = measure(args.repeat, store.capacity_features)
+
+    print(f"tasks: {args.tasks}, TaskStore load: {loaded * 1000:.0f} ms (after the first paint and on bulk sync)")
+    for label, (elapsed, features) in results.items():
+        print(f"{label}: {elapsed * 1000:.2f} ms/call, features "
+              f"{', '.join(f'{value:.2f}' if isinstance(value, float) else str(value) for value in features)}")
+
+
+if __name__ == "__main__":
+    main()
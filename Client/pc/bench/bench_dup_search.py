@@ -0,0 +1,114 @@
+"""Поиск дублей: индекс биграмм против полного перебора SequenceMatcher.
+
+    python bench/bench_dup_search.py --tasks 50000 --queries 200 --scans 5
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from difflib import SequenceMatcher
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, select
+
+from local_db import data_manager
+from local_db.dup_index import DUPLICATE_THRESHOLD, SEARCH_STATUSES, create_dup_index, find_duplicates
+from local_db.models import Task
+
+LETTERS = "абвгдежзиклмнопрстуфхцчшыэюя"
+
+
+def make_vocabulary(rng, size):
+    return ["".join(rng.choice(LETTERS) for _ in range(rng.randint(3, 10))) for _ in range(size)]
+
+
+def make_text(rng, vocabulary, weights, words):
+    return " ".join(rng.choices(vocabulary, weights, k=rng.randint(*words)))
+
+
+def perturb(rng, value):
+    # Опечатка, вставка, перестановка слов или обрезка - как у дублей, которые вводят руками
+    words = value.split()
+    action = rng.choice(("typo", "insert", "swap", "truncate"))
+    if action == "typo" and value:
+        position = rng.randrange(len(value))
+        return value[:position] + rng.choice(LETTERS) + value[position + 1:]
+    if action == "insert":
+        words.insert(rng.randint(0, len(words)), rng.choice(words or ["и"]))
+    elif action == "swap" and len(words) > 1:
+        i = rng.randrange(len(words) - 1)
+        words[i], words[i + 1] = words[i + 1], words[i]
+    elif action == "truncate" and len(words) > 2:
+        words.pop()
+    return " ".join(words)
+
+
+def full_scan(session, title, description):
+    title, description = title.lower(), description.lower()
+    rows = session.execute(
+        select(Task.title, Task.description, Task.deadline).where(Task.status.in_(SEARCH_STATUSES))
+    ).all()
+    return {
+        (row.title, row.description) for row in rows
+        if SequenceMatcher(None, title, (row.title or "").lower()).ratio() >= DUPLICATE_THRESHOLD
+        or SequenceMatcher(None, description, (row.description or "").lower()).ratio() >= DUPLICATE_THRESHOLD
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--scans", type=int, default=5, help="сколько запросов сверить полным перебором")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(rng, 5000)
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    texts = [
+        (make_text(rng, vocabulary, weights, (2, 5)), make_text(rng, vocabulary, weights, (8, 15)))
+        for _ in range(args.tasks)
+    ]
+
+    path = os.path.join(tempfile.mkdtemp(), "SPS.db")
+    engine = create_engine(f"sqlite:///{path}")
+    data_manager.Session.configure(bind=engine)
+    data_manager.engine = engine
+    data_manager._migrate_schema()
+
+    with engine.begin() as connection:
+        connection.execute(insert(Task), [
+            {"id": str(uuid.uuid4()), "title": title, "description": description,
+             "deadline": datetime(2030, 1, 1), "status": rng.choice(("underway", "overdue", "completed"))}
+            for title, description in texts
+        ])
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        create_dup_index(connection)
+    print(f"tasks: {args.tasks}, index build: {time.perf_counter() - started:.1f} s, "
+          f"db size: {os.path.getsize(path) / 2 ** 20:.1f} MB")
+
+    queries = [(perturb(rng, title), perturb(rng, description)) for title, description in rng.sample(texts, args.queries)]
+    with data_manager.Session() as session:
+        started = time.perf_counter()
+        found = [find_duplicates(session, title, description) for title, description in queries]
+        indexed = (time.perf_counter() - started) / len(queries)
+        print(f"indexed: {indexed * 1000:.1f} ms/query, "
+              f"{sum(map(len, found))} duplicates over {len(queries)} queries")
+
+        started = time.perf_counter()
+        for (title, description), duplicates in zip(queries[:args.scans], found):
+            assert {(row[0], row[1]) for row in duplicates} == full_scan(session, title, description)
+        if args.scans:
+            scan = (time.perf_counter() - started) / min(args.scans, len(queries))
+            print(f"full scan: {scan * 1000:.0f} ms/query, same results on {min(args.scans, len(queries))} queries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Профиль PRAGMA локальной базы: задержки записи и чтения без него и с SQLITE_PRAGMAS.
+
+    python bench/bench_sqlite_pragmas.py --tasks 100000 --writes 300
+
+Каждый профиль получает свой файл базы: journal_mode=wal сохраняется в файле.
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, func, insert, select, update
+
+from local_db import data_manager
+from local_db.models import Task, TaskType
+
+PROFILES = ("default", "pragmas")
+
+
+def open_database(profile, tasks, rng):
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'SPS.db')}",
+                           connect_args={"check_same_thread": False})
+    if profile == "pragmas":
+        event.listen(engine, "connect", data_manager._apply_sqlite_pragmas)
+    data_manager.Session.configure(bind=engine)
+    data_manager.engine = engine
+    data_manager._migrate_schema()
+
+    now = datetime.now()
+    with engine.begin() as connection:
+        connection.execute(insert(TaskType), [{"name": "Other"}])
+        connection.execute(insert(Task), [
+            {"id": str(uuid.uuid4()), "title": f"task {i}", "description": "", "task_type_id": 1,
+             "deadline": now + timedelta(days=rng.randint(-30, 60)),
+             "status": rng.choice(("underway", "overdue", "completed")), "final_priority": "Mid"}
+            for i in range(tasks)
+        ])
+    return engine
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return samples[len(samples) // 2] * 1000, samples[int(len(samples) * 0.95)] * 1000
+
+
+def measure_writes(count):
+    deadline = (datetime.now() + timedelta(days=7)).strftime("%Y-%m-%d")
+    samples = []
+    for i in range(count):
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            data_manager.create_task(f"new {i}", "", "Other", 3, 3, deadline, "Mid")
+        samples.append(time.perf_counter() - started)
+    return percentiles(samples)
+
+
+def read_underway():
+    with data_manager.Session() as session:
+        return session.execute(select(Task.id, Task.title, Task.deadline).where(Task.status == "underway")).all()
+
+
+def read_status_counts():
+    with data_manager.Session() as session:
+        return session.execute(select(Task.status, func.count()).group_by(Task.status)).all()
+
+
+def measure_reads(repeat):
+    return {
+        name: statistics.median(timed(read) for _ in range(repeat)) * 1000
+        for name, read in (("underway list", read_underway), ("status counts", read_status_counts))
+    }
+
+
+def timed(call):
+    started = time.perf_counter()
+    call()
+    return time.perf_counter() - started
+
+
+def read_during_write(engine, hold):
+    # Синхронизация держит транзакцию записи, а интерфейс в это время читает
+    writing = threading.Event()
+
+    def writer():
+        with engine.begin() as connection:
+            connection.execute(update(Task).values(description="sync"))
+            writing.set()
+            time.sleep(hold)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    writing.wait()
+    elapsed = timed(read_status_counts)
+    thread.join()
+    return elapsed * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--writes", type=int, default=300)
+    parser.add_argument("--reads", type=int, default=10)
+    parser.add_argument("--hold", type=float, default=1.0, help="сколько секунд держится транзакция записи")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"tasks: {args.tasks}, pragmas: {data_manager.sqlite_pragmas}")
+    for profile in PROFILES:
+        engine = open_database(profile, args.tasks, random.Random(args.seed))
+        p50, p95 = measure_writes(args.writes)
+        reads = ", ".join(f"{name} {value:.1f} ms" for name, value in measure_reads(args.reads).items())
+        blocked = read_during_write(engine, args.hold)
+        print(f"{profile}: create_task p50 {p50:.2f} ms, p95 {p95:.2f} ms; {reads}; "
+              f"read during {args.hold:.0f} s write {blocked:.0f} ms")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Первая синхронизация: байты и время отправки и загрузки задач с gzip и без.
+
+    python bench/bench_sync_gzip.py --tasks 10000
+    python bench/bench_sync_gzip.py --tasks 10000 --url http://localhost:8000 --token <jwt>
+
+Без --url бенчмарк поднимает сервер из Backend/sync_server на временной базе SQLite
+и регистрирует в нем пользователя. Отправка идет пачками, как у SyncService._push_chunk,
+загрузка - страницами /sync/pull, как у SyncService._pull, с Accept-Encoding gzip и identity.
+"""
+import argparse
+import contextlib
+import gzip
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.sync_service import SyncService
+from local_db.data_manager import TASK_SYNC_FIELDS
+from local_db.models import Task
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "Backend", "sync_server")
+WORDS = ["отчет", "встреча", "исправить", "ошибка", "клиент", "релиз", "документация", "сервер", "тесты", "план"]
+
+
+def make_tasks(rng, count):
+    now = datetime.now(timezone.utc)
+    return [
+        Task(id=str(uuid.uuid4()), title=" ".join(rng.choices(WORDS, k=rng.randint(2, 5))),
+             description=" ".join(rng.choices(WORDS, k=rng.randint(5, 30))), task_type_id=rng.randint(1, 4),
+             personal_priority=rng.randint(1, 5), influence=rng.randint(1, 5),
+             status=rng.choice(("underway", "overdue", "completed")), final_priority=rng.choice(("Low", "Mid", "High")),
+             created_at=now, updated_at=now, deadline=now + timedelta(days=rng.randint(-10, 60)))
+        for _ in range(count)
+    ]
+
+
+@contextlib.contextmanager
+def local_server():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'server.db')}",
+               DATABASE_ASYNC="false")
+    env.setdefault("SECRET_KEY", uuid.uuid4().hex * 2)
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+                              cwd=SERVER_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            with contextlib.suppress(requests.ConnectionError):
+                requests.get(f"{url}/docs", timeout=1)
+                break
+            time.sleep(0.1)
+        yield url
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def register(url):
+    response = requests.post(f"{url}/auth/register", timeout=30,
+                             json={"email": f"bench-{uuid.uuid4().hex[:8]}@example.com", "password": "bench-password"})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def push(service, chunks, gzip_requests):
+    service.gzip_requests = gzip_requests
+    sent = encode = 0
+    started = time.perf_counter()
+    for payload in chunks:
+        encode_started = time.perf_counter()
+        body, headers = service._encode_payload(payload)
+        encode += time.perf_counter() - encode_started
+        sent += len(body)
+        service.http.post(f"{service.url}/push", data=body, headers=headers, timeout=service.timeout).raise_for_status()
+    return sent, encode, time.perf_counter() - started
+
+
+def pull(service, accept_encoding):
+    # Байты считаются до распаковки - столько же прошло бы по сети
+    received = tasks = 0
+    cursor = None
+    started = time.perf_counter()
+    while True:
+        params = {"last_sync": "2000-01-01T00:00:00Z", "limit": service.pull_page_size, "delta": "true"}
+        if cursor:
+            params["cursor"] = cursor
+        with service.http.get(f"{service.url}/pull", params=params, headers={"Accept-Encoding": accept_encoding},
+                              stream=True, timeout=service.timeout) as response:
+            response.raise_for_status()
+            body = response.raw.read(decode_content=False)
+        received += len(body)
+        if response.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        data = json.loads(body)
+        tasks += len(data.get("tasks", [])) + len(data.get("changes", []))
+        cursor = data.get("next_cursor")
+        if not cursor:
+            return received, tasks, time.perf_counter() - started
+
+
+def run(args, url, token):
+    service = SyncService(token=token)
+    service.url = f"{url}/sync"
+    tasks = [service._serialize_task(task, TASK_SYNC_FIELDS) for task in make_tasks(random.Random(args.seed), args.tasks)]
+    chunks = [
+        {"tasks": tasks[start:start + service.push_chunk_size], "changes": []}
+        for start in range(0, len(tasks), service.push_chunk_size)
+    ]
+
+    print(f"tasks: {args.tasks}, push chunks: {len(chunks)} x {service.push_chunk_size}, "
+          f"pull pages of {service.pull_page_size}")
+    for label, gzip_requests in (("plain", False), ("gzip", True)):
+        sent, encode, total = push(service, chunks, gzip_requests)
+        print(f"push {label}: {sent / 2 ** 20:.2f} MB, encode {encode * 1000:.0f} ms, total {total:.2f} s")
+    for label, accept_encoding in (("plain", "identity"), ("gzip", "gzip")):
+        received, count, total = pull(service, accept_encoding)
+        print(f"pull {label}: {count} tasks, {received / 2 ** 20:.2f} MB, total {total:.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--url", help="адрес сервера синхронизации; без него поднимается локальный")
+    parser.add_argument("--token", help="JWT пользователя; без него регистрируется новый")
+    args = parser.parse_args()
+
+    if args.url:
+        run(args, args.url, args.token or register(args.url))
+        return
+    with local_server() as url:
+        run(args, url, register(url))
+
+
+if __name__ == "__main__":
+    main()
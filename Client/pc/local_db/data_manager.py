@@ -1,15 +1,43 @@
 from PyQt6.QtWidgets import QMessageBox
-from sqlalchemy import create_engine, select,func,case
+from sqlalchemy import create_engine, select,func,case, event, inspect, text, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import sessionmaker
+from contextlib import contextmanager
 from datetime import datetime, date as dt_date
 import uuid
 from datetime import timezone
 import shutil
+import time
 
-from local_db.models import Base, TaskType, Task, DailyStats
+from local_db.models import Base, TaskType, Task, DailyStats, TaskChange
+from local_db.dup_index import create_dup_index, find_duplicates, update_dup_index
+import json
 import os
 import sys
 
+# Профиль PRAGMA для локальной базы; ключи из "sqlite_pragmas" в config.json переопределяют значения,
+# null отключает pragma
+SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "cache_size": -16000,
+    "mmap_size": 268435456,
+    "temp_store": "memory",
+    "busy_timeout": 5000,
+}
+
+
+def _read_sqlite_pragmas():
+    config_path = os.path.join(os.path.dirname(__file__), '..', 'config.json')
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            overrides = json.load(f).get("sqlite_pragmas", {})
+    except FileNotFoundError:
+        overrides = {}
+    pragmas = {**SQLITE_PRAGMAS, **overrides}
+    return {name: value for name, value in pragmas.items() if value is not None}
+
+
 def get_db_path():
     if getattr(sys, 'frozen', False):
         if sys.platform == "win32":
@@ -30,6 +58,14 @@ def get_db_path():
         return os.path.join(db_dir, "SPS.db")
 
 
+def delete_database(db_path):
+    # Вместе с базой удаляем файлы WAL: -wal и -shm остаются, если соединение закрылось не последним
+    engine.dispose()
+    for path in (db_path, db_path + "-wal", db_path + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
 def get_template_db_path():
     if getattr(sys, 'frozen', False):
         base_path = sys._MEIPASS
@@ -51,9 +87,21 @@ def init_db():
     else:
         print(f"ℹ️ БД найдена: {db_path}")
 
+    # Существующая база или шаблон из старой сборки могут не иметь новых таблиц и индексов
+    _migrate_schema()
     return db_path
 
 
+def _migrate_schema():
+    Base.metadata.create_all(engine)
+    for index in Task.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+    with engine.begin() as connection:
+        # Индекс по deadline читали окна задач до TaskStore
+        connection.execute(text("DROP INDEX IF EXISTS ix_tasks_deadline"))
+        create_dup_index(connection)
+
+
 def _create_db_structure(db_path):
     temp_engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
     Base.metadata.create_all(temp_engine)
@@ -75,121 +123,153 @@ def _create_db_structure(db_path):
 db_full_path = get_db_path()
 engine = create_engine(f"sqlite:///{db_full_path}", connect_args={"check_same_thread": False}, echo=False)
 
+sqlite_pragmas = _read_sqlite_pragmas()
+
+
+@event.listens_for(engine, "connect")
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL позволяет читать интерфейсу, пока синхронизация пишет в базу
+    cursor = dbapi_connection.cursor()
+    for name, value in sqlite_pragmas.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
 Session = sessionmaker(bind=engine)
 
+# Имя операции -> [вызовов, суммарное время, максимальное время] в секундах
+OPERATION_TIMINGS = {}
 
-def insert_task(title, desc, task_type_name, self_priority, influence, deadline_str, priority):
+
+@contextmanager
+def unit_of_work(name):
+    # Одно действие пользователя - одна транзакция и один commit
     session = Session()
+    start = time.perf_counter()
     try:
-        new_task_id = str(uuid.uuid4())
-        dt = datetime.strptime(deadline_str, "%Y-%m-%d")
-        deadline = datetime.combine(dt.date(), datetime.min.time())
-        now = datetime.now(timezone.utc)
-        task_type = session.query(TaskType).filter_by(name=task_type_name).first()
-        if not task_type:
-            raise ValueError(f"TaskType '{task_type_name}' не найден")
-
-        task = Task(
-            id = new_task_id,
-            title=title,
-            description=desc,
-            task_type_id=task_type.id,
-            personal_priority=self_priority,
-            influence=influence,
-            created_at=now,
-            deadline=deadline,
-            final_priority=priority,
-            updated_at=now
-        )
-
-        session.add(task)
+        yield session
         session.commit()
-        print(f"✅ Задача '{title}' добавлена.")
-    except Exception as e:
+    except Exception:
         session.rollback()
-        raise e
+        raise
     finally:
         session.close()
+        _record_timing(name, time.perf_counter() - start)
 
 
-def select_daily_tasks(calendar_date):
-    session = Session()
-    date = datetime.combine(calendar_date, datetime.min.time())
-    tasks = []
-    query = select(Task).where(Task.deadline == date)
-    result = session.execute(query)
-    tasks_obj = result.scalars().all()
-    for task in tasks_obj:
-        tasks.append((task.title," — ",task.final_priority))
-    session.close()
-    return tasks
+def _record_timing(name, seconds):
+    timing = OPERATION_TIMINGS.setdefault(name, [0, 0.0, 0.0])
+    timing[0] += 1
+    timing[1] += seconds
+    timing[2] = max(timing[2], seconds)
 
-def select_underway_tasks():
-    session = Session()
-    tasks = []
-    query = select(Task.title).where((Task.status == "underway") | (Task.status == "overdue"))
-    result = session.execute(query)
-    tasks_obj = result.all()
-    for task in tasks_obj:
-        tasks.append(task.title)
-    session.close()
-    return tasks
 
-def select_completed_tasks():
-    session = Session()
-    tasks = []
-    query = select(Task.title).where(Task.status == "completed")
-    result = session.execute(query)
-    tasks_obj = result.all()
-    for task in tasks_obj:
-        tasks.append(task.title)
-    session.close()
-    return tasks
+def operation_timings():
+    return {
+        name: {"calls": calls, "avg_ms": total / calls * 1000, "max_ms": longest * 1000}
+        for name, (calls, total, longest) in OPERATION_TIMINGS.items()
+    }
 
-def select_task_property_for_edit(task_title):
-    session = Session()
-    query = session.query(Task).filter(Task.title == task_title).all()
-
-    for task in query:
-        title = task.title
-        desc = task.description
-        t_type = task.task_type.name
-        dl = task.deadline
-        prio = task.final_priority
-    session.close()
-    return title, desc, t_type, dl, prio
+DUP_INDEX_FIELDS = ("title", "description", "status")
+TASK_SYNC_FIELDS = [column.key for column in Task.__table__.columns if column.key not in ("id", "updated_at")]
 
 
-def update_task_propeties(task_title: str,task_description: str,new_deadline: str,
-                          new_status: str,new_priority: str,new_task_type_name: str):
-    session = Session()
-    try:
-        task = (
-            session.query(Task)
-            .filter_by(title=task_title, description=task_description)
-            .first()
+@event.listens_for(Session, "before_flush")
+def _record_task_changes(session, flush_context, instances):
+    # Изменения, пришедшие с сервера, обратно не отправляем
+    if session.info.get("sync"):
+        return
+
+    changes = [{"task_id": obj.id, "field": "*"} for obj in session.new if isinstance(obj, Task)]
+    for obj in session.dirty:
+        if not isinstance(obj, Task):
+            continue
+        state = inspect(obj)
+        changes.extend(
+            {"task_id": obj.id, "field": field}
+            for field in TASK_SYNC_FIELDS
+            if state.attrs[field].history.has_changes()
         )
 
-        if not task:
-            print("Задача не найдена.")
-            return
-        deadline = datetime.strptime(new_deadline, "%Y-%m-%d")
+    if changes:
+        session.execute(sqlite_insert(TaskChange).on_conflict_do_nothing(), changes)
 
-        task_type = session.query(TaskType).filter_by(name=new_task_type_name).first()
-        if not task_type:
-            raise ValueError(f"Тип задачи '{new_task_type_name}' не найден.")
 
-        task.deadline = deadline
-        task.status = new_status
-        task.final_priority = new_priority
-        task.task_type_id = task_type.id
-        task.updated_at = datetime.now(timezone.utc)
-        session.commit()
+@event.listens_for(Session, "before_flush")
+def _index_task_text(session, flush_context, instances):
+    # Индекс поиска дублей обновляется и при слиянии задач с сервера
+    changed = [obj for obj in session.new if isinstance(obj, Task)]
+    changed.extend(
+        obj for obj in session.dirty
+        if isinstance(obj, Task) and any(inspect(obj).attrs[field].history.has_changes() for field in DUP_INDEX_FIELDS)
+    )
+    # Значение status по умолчанию столбец подставит только при INSERT
+    tasks = [(obj.id, obj.title, obj.description, obj.status or "underway") for obj in changed]
+    tasks.extend((obj.id, None, None, None) for obj in session.deleted if isinstance(obj, Task))
+    update_dup_index(session, tasks)
+
+
+def create_task(title, desc, task_type_name, self_priority, influence, deadline_str, priority):
+    # Задача и счетчики дня сохраняются вместе
+    with unit_of_work("create_task") as session:
+        task_id = _add_task(session, title, desc, task_type_name, self_priority, influence, deadline_str, priority).id
+        _add_task_to_daily_stats(session, dt_date.today())
+    print(f"✅ Задача '{title}' добавлена.")
+    return task_id
+
+
+def _add_task(session, title, desc, task_type_name, self_priority, influence, deadline_str, priority):
+    dt = datetime.strptime(deadline_str, "%Y-%m-%d")
+    deadline = datetime.combine(dt.date(), datetime.min.time())
+    now = datetime.now(timezone.utc)
+    task_type = session.query(TaskType).filter_by(name=task_type_name).first()
+    if not task_type:
+        raise ValueError(f"TaskType '{task_type_name}' не найден")
+
+    task = Task(
+        id = str(uuid.uuid4()),
+        title=title,
+        description=desc,
+        task_type_id=task_type.id,
+        personal_priority=self_priority,
+        influence=influence,
+        created_at=now,
+        deadline=deadline,
+        final_priority=priority,
+        updated_at=now
+    )
+    session.add(task)
+    return task
+
+
+def save_task_edit(task_id: str, new_deadline: str,
+                   new_status: str, new_priority: str, new_task_type_name: str):
+    # Завершение задачи и правка ее полей - одно действие и одна транзакция
+    try:
+        with unit_of_work("save_task_edit") as session:
+            task = session.get(Task, task_id)
+            if not task:
+                print("Задача не найдена.")
+                return
+            if new_status == "completed" and task.status != "completed":
+                _complete_task(session, task, dt_date.today())
+            _update_task(session, task, new_deadline, new_status, new_priority, new_task_type_name)
     except Exception as e:
-        session.rollback()
         print("Ошибка при обновлении:", e)
-    finally:
-        session.close()
+
+
+def _update_task(session, task, new_deadline, new_status, new_priority, new_task_type_name):
+    deadline = datetime.strptime(new_deadline, "%Y-%m-%d")
+
+    task_type = session.query(TaskType).filter_by(name=new_task_type_name).first()
+    if not task_type:
+        raise ValueError(f"Тип задачи '{new_task_type_name}' не найден.")
+
+    task.deadline = deadline
+    task.status = new_status
+    task.final_priority = new_priority
+    task.task_type_id = task_type.id
+    task.updated_at = datetime.now(timezone.utc)
 
 def select_priority_counts():
     session = Session()
@@ -206,40 +286,25 @@ def select_priority_counts():
     return labels,values
 
 def daily_insert():
-    session = Session()
-    today = dt_date.today()
-    exists = session.query(DailyStats).filter(DailyStats.date == today).first()
-    if exists:
-        print("today stats exists")
-        pass
-    else:
-        insert_daily_info(today)
-    session.close()
-
-
-def insert_daily_info(date):
-    session = Session()
-
-    all_tasks = session.execute(select(func.count(Task.title))).scalar()
+    with unit_of_work("daily_insert") as session:
+        today = dt_date.today()
+        if _get_daily_stats(session, today):
+            print("today stats exists")
+        else:
+            session.add(_new_daily_stats(session, today))
 
-    daily_info = session.execute(
-        select(Task.status, func.count(Task.status))
-        .where(Task.status != "completed")
-        .group_by(Task.status)
-    ).all()
 
-    if daily_info:
-        stats, count = zip(*daily_info)
-        stats = list(stats)
-        count = list(count)
-    else:
-        session.close()
-        return  0,0
+def _get_daily_stats(session, date):
+    return session.query(DailyStats).filter(DailyStats.date == date).first()
 
-    overdue_tasks = count[0] if len(count) > 0 else 0
-    in_progress_tasks = count[1] if len(count) > 1 else 0
 
-    daily_stat = DailyStats(
+def _new_daily_stats(session, date):
+    all_tasks, overdue_tasks, in_progress_tasks = session.execute(select(
+        func.count(Task.id),
+        func.count(case((Task.status == "overdue", 1))),
+        func.count(case((Task.status == "underway", 1))),
+    )).one()
+    return DailyStats(
         date=date,
         total_tasks=all_tasks,
         completed_tasks=0,
@@ -247,91 +312,93 @@ def insert_daily_info(date):
         in_progress_tasks=in_progress_tasks,
     )
 
-    session.add(daily_stat)
-    session.commit()
-
-def update_daily_info_add_task(date: dt_date, new_total_tasks: int = 1, new_in_progress_tasks: int = 1):
-    session = Session()
-    try:
-        record = session.query(DailyStats).filter(DailyStats.date == date).first()
-        record.total_tasks += new_total_tasks
-        record.in_progress_tasks += new_in_progress_tasks
-        session.commit()
-    except Exception as e:
-        session.rollback()
-        print("Ошибка при обновлении total/in-progress:", e)
-    finally:
-        session.close()
-
 
-def update_daily_info_overdue_tasks(date, new_overdue_tasks, new_in_progress_tasks):
-    session = Session()
-    try:
-        record = session.query(DailyStats).filter(DailyStats.date == date).first()
+def _daily_stats_for_update(session, date):
+    # Счетчики новой строки берем из уже сохраненных задач: без no_autoflush запрос
+    # сбросил бы в базу задачу из этой же транзакции, и вызывающий посчитал бы ее второй раз
+    with session.no_autoflush:
+        record = _get_daily_stats(session, date)
         if record is None:
-            record = DailyStats(
-                date=date,
-                total_tasks=0,
-                completed_tasks=0,
-                overdue_tasks=new_overdue_tasks,
-                in_progress_tasks=new_in_progress_tasks,
-            )
+            record = _new_daily_stats(session, date)
             session.add(record)
-        else:
-            record.in_progress_tasks = new_in_progress_tasks
-            record.overdue_tasks = new_overdue_tasks
-        session.commit()
-    except Exception as e:
-        session.rollback()
-        print("Ошибка при обновлении overdue:", e)
-    finally:
-        session.close()
+    return record
 
 
-def update_daily_info_complete_task(date, title, description):
-    session = Session()
-    try:
-        task = (
-            session.query(Task)
-            .filter(Task.title == title, Task.description == description)
-            .first()
-        )
-        was_overdue = (task.status == "overdue")
-        task.status = "completed"
-        task.updated_at = datetime.now(timezone.utc)
-        record = session.query(DailyStats).filter(DailyStats.date == date).first()
-        record.completed_tasks += 1
-        if was_overdue:
-            record.overdue_tasks -= 1
-        else:
-            record.in_progress_tasks -= 1
+def _add_task_to_daily_stats(session, date, new_total_tasks=1, new_in_progress_tasks=1):
+    record = _daily_stats_for_update(session, date)
+    record.total_tasks += new_total_tasks
+    record.in_progress_tasks += new_in_progress_tasks
 
-        session.commit()
-    except Exception as e:
-        session.rollback()
-        print("Ошибка при обновлении completed:", e)
-    finally:
-        session.close()
+
+def _set_daily_status_counts(session, date, overdue_tasks, in_progress_tasks):
+    record = _daily_stats_for_update(session, date)
+    record.in_progress_tasks = in_progress_tasks
+    record.overdue_tasks = overdue_tasks
+
+
+def _complete_task(session, task, date):
+    record = _daily_stats_for_update(session, date)
+    record.completed_tasks += 1
+    if task.status == "overdue":
+        record.overdue_tasks -= 1
+    else:
+        record.in_progress_tasks -= 1
 
 def update_tasks_status():
-    session = Session()
     try:
-        now = datetime.now(timezone.utc)
-        tasks = session.query(Task).filter(Task.status != "completed").all()
-        for task in tasks:
-            if task.deadline < now:
-                task.status = "overdue"
-
-        overdue_tasks = len(session.query(Task).filter(Task.status == "overdue").all())
-        in_progress_tasks = len(session.query(Task).filter(Task.status == "underway").all())
-        session.commit()
-        session.close()
-        today = dt_date.today()
-        update_daily_info_overdue_tasks(today,overdue_tasks,in_progress_tasks)
+        with unit_of_work("update_tasks_status") as session:
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            # Просрочку проставляет сама база, строки задач в Python не загружаются
+            overdue_ids = session.execute(
+                update(Task)
+                .where(Task.status == "underway", Task.deadline < now)
+                .values(status="overdue", updated_at=now)
+                .returning(Task.id)
+                .execution_options(synchronize_session=False)
+            ).scalars().all()
+            # Массовый UPDATE минует before_flush, поэтому изменения для синхронизации пишем сами
+            if overdue_ids:
+                session.execute(
+                    sqlite_insert(TaskChange).on_conflict_do_nothing(),
+                    [{"task_id": task_id, "field": "status"} for task_id in overdue_ids]
+                )
+
+            overdue_tasks, in_progress_tasks = session.execute(select(
+                func.count(case((Task.status == "overdue", 1))),
+                func.count(case((Task.status == "underway", 1))),
+            )).one()
+            _set_daily_status_counts(session, dt_date.today(), overdue_tasks, in_progress_tasks)
+        return overdue_ids
     except Exception as e:
         print("Ошбика обновления статуса", e)
-        session.rollback()
-        session.close()
+        return []
+
+def reprioritize_underway_tasks(predict_batch):
+    with unit_of_work("reprioritize_underway_tasks") as session:
+        tasks = (
+            session.query(Task, TaskType.name)
+            .join(TaskType, Task.task_type_id == TaskType.id)
+            .filter(Task.status == "underway")
+            .all()
+        )
+        if not tasks:
+            return 0
+
+        priorities = predict_batch(
+            [type_name for _, type_name in tasks],
+            [task.deadline.strftime("%Y-%m-%d") for task, _ in tasks],
+            [(task.personal_priority or 0) + (task.influence or 0) for task, _ in tasks]
+        )
+
+        now = datetime.now(timezone.utc)
+        changed = 0
+        for (task, _), priority in zip(tasks, priorities):
+            if task.final_priority != priority:
+                task.final_priority = priority
+                task.updated_at = now
+                changed += 1
+        return changed
+
 
 def select_daily_task_complete():
     session = Session()
@@ -341,15 +408,6 @@ def select_daily_task_complete():
     session.close()
     return daily_info
 
-def select_closest_tasks():
-    now = dt_date.today()
-    session = Session()
-    query = (select(Task.title,Task.description).where((Task.deadline >= now) & (Task.status == "underway"))
-             .order_by(Task.deadline.asc()).limit(3))
-    result = session.execute(query).all()
-    session.close()
-    return result
-
 def select_all_tasks():
     session = Session()
     query = select(Task.status,func.count(Task.title)).group_by(Task.status)
@@ -363,32 +421,6 @@ def select_all_tasks():
     count = list(count)
     return status, count
 
-def select_tasks_by_type():
-    session = Session()
-    query = select(TaskType.name,func.count(Task.title)).join(TaskType).group_by(TaskType.name)
-    result = session.execute(query).all()
-    session.close()
-    if not result:
-        QMessageBox.information(None, "Внимание", "Нет данных для отображения")
-        return [], []
-    type, count = zip(*result)
-    type = list(type)
-    count = list(count)
-    return type, count
-
-def select_completed_by_types():
-    session = Session()
-    query = select(TaskType.name, func.count(Task.title)).join(TaskType).where(Task.status == "completed").group_by(TaskType.name)
-    result = session.execute(query).all()
-    session.close()
-    if not result:
-        QMessageBox.information(None, "Внимание", "Нет данных для отображения")
-        return [], []
-    type, count = zip(*result)
-    type = list(type)
-    count = list(count)
-    return type, count
-
 def select_daily_tasks_underday():
     session = Session()
     query = select(DailyStats.date, DailyStats.in_progress_tasks)
@@ -400,58 +432,9 @@ def select_daily_tasks_underday():
         return [], []
     return daily_info
 
-def select_capacity_parametrs():
-    session = Session()
-    query = select(func.count(Task.title)).where(Task.status == "underway")
-    active_tasks = session.execute(query).scalar()
-    query = select(func.avg(
-        case(
-            (Task.final_priority == "Casual", 1),
-            (Task.final_priority == "Low", 2),
-            (Task.final_priority == "Mid", 3),
-            (Task.final_priority == "High", 4),
-            (Task.final_priority == "Extreme", 5),
-        )
-    )).where(Task.status == "underway")
-    avg_priority = session.execute(query).scalar()
-    query = select(func.max(
-        case(
-            (Task.final_priority == "Casual", 1),
-            (Task.final_priority == "Low", 2),
-            (Task.final_priority == "Mid", 3),
-            (Task.final_priority == "High", 4),
-            (Task.final_priority == "Extreme", 5),
-        )
-    )).where(Task.status == "underway")
-    max_priority = session.execute(query).scalar()
-    query = select(
-        (func.julianday(Task.deadline) - func.julianday(func.current_timestamp())) * 24
-    ).where(Task.status == "underway")
-    avg_hours_to_deadline = session.execute(query).scalar()
-    query = select(func.count(Task.title)).where(Task.status == "overdue")
-    overdue_tasks = session.execute(query).scalar()
-    session.close()
-    if avg_hours_to_deadline == None:
-        return 0,0,0,0,0
-    return active_tasks, avg_priority, max_priority, int(avg_hours_to_deadline), overdue_tasks
-
-def select_tasks_for_dupsearch():
-    session = Session()
-    tasks = []
-    query = select(Task.title,Task.description).where((Task.status == "underway") | (Task.status == "overdue"))
-    result = session.execute(query)
-    tasks_obj = result.all()
-    for task in tasks_obj:
-        tasks.append([task.title,task.description])
-    session.close()
-    return tasks
-
-def select_duplicate_deadline(title,description):
+def find_duplicate_tasks(title, description):
     session = Session()
-    query = select(Task.deadline).where((Task.title == title)&(Task.description == description))
-    result = session.execute(query)
-    task_dup = result.scalar()
+    duplicates = find_duplicates(session, title, description)
     session.close()
-    dup_deadline = datetime.date(task_dup)
-    return dup_deadline
+    return duplicates
 
@@ -0,0 +1,175 @@
+import json
+import math
+from collections import Counter
+from difflib import SequenceMatcher
+
+from sqlalchemy import and_, bindparam, delete, func, insert, or_, select, text, union
+
+from local_db.models import Task, TaskBigram, TaskSearchDoc
+
+DUPLICATE_THRESHOLD = 0.8
+SEARCH_STATUSES = ("underway", "overdue")
+FIELDS = ("title", "description")
+# Запас на ошибку округления float: границы отбора не должны оказаться строже точных
+ROUNDING_SLACK = 1e-9
+# Ограничение SQLite на число параметров в одном запросе
+CHUNK_SIZE = 500
+
+# Индекс пишется из before_flush, поэтому запросы к нему - Core, без ORM-семантики сессии
+docs_table = TaskSearchDoc.__table__
+bigrams_table = TaskBigram.__table__
+
+# Первая версия индекса была триграммной FTS5 поверх tasks.rowid
+LEGACY_SCHEMA = [
+    "DROP TRIGGER IF EXISTS task_search_ai",
+    "DROP TRIGGER IF EXISTS task_search_ad",
+    "DROP TRIGGER IF EXISTS task_search_au",
+    "DROP TABLE IF EXISTS task_search_instance",
+    "DROP TABLE IF EXISTS task_search_vocab",
+    "DROP TABLE IF EXISTS task_search",
+]
+
+
+def create_dup_index(connection):
+    # Запускается при старте: приводит индекс в соответствие с задачами, измененными в обход
+    # сессий приложения, и строит его целиком для базы, где индекса еще не было
+    for statement in LEGACY_SCHEMA:
+        connection.execute(text(statement))
+
+    stale = connection.execute(
+        select(Task.id, Task.title, Task.description, Task.status)
+        .outerjoin(TaskSearchDoc, TaskSearchDoc.task_id == Task.id)
+        .where(Task.status.in_(SEARCH_STATUSES), or_(
+            TaskSearchDoc.doc.is_(None),
+            TaskSearchDoc.title.is_not(Task.title),
+            TaskSearchDoc.description.is_not(Task.description),
+        ))
+    ).all()
+    inactive = connection.execute(
+        select(TaskSearchDoc.task_id, Task.title, Task.description, Task.status)
+        .outerjoin(Task, Task.id == TaskSearchDoc.task_id)
+        .where(or_(Task.id.is_(None), Task.status.not_in(SEARCH_STATUSES)))
+    ).all()
+    update_dup_index(connection, stale + inactive)
+
+
+def update_dup_index(connection, tasks):
+    # tasks - (id, title, description, status) после изменения; status=None - задача удалена.
+    # Индексируются только задачи, среди которых ищутся дубли
+    for chunk in _chunks(list(tasks)):
+        _unindex(connection, [task_id for task_id, _, _, _ in chunk])
+        active = [task for task in chunk if task[3] in SEARCH_STATUSES]
+        if not active:
+            continue
+        docs = dict(connection.execute(
+            insert(docs_table).returning(docs_table.c.task_id, docs_table.c.doc, sort_by_parameter_order=True),
+            [{"task_id": task_id, "title": title, "description": description} for task_id, title, description, _ in active],
+        ).all())
+        bigrams = [
+            {"field": field, "gram": gram, "doc": docs[task_id], "count": count}
+            for task_id, title, description, _ in active
+            for field, value in enumerate((title, description))
+            for gram, count in _bigrams((value or "").lower()).items()
+        ]
+        if bigrams:
+            connection.execute(insert(bigrams_table), bigrams)
+
+
+def _unindex(connection, task_ids):
+    indexed = connection.execute(
+        select(docs_table.c.doc, docs_table.c.title, docs_table.c.description)
+        .where(docs_table.c.task_id.in_(task_ids))
+    ).all()
+    # Удаляем по первичному ключу (field, gram, doc), биграммы восстанавливаем из сохраненного текста
+    bigrams = [
+        {"b_field": field, "b_gram": gram, "b_doc": doc}
+        for doc, *values in indexed
+        for field, value in enumerate(values)
+        for gram in _bigrams((value or "").lower())
+    ]
+    if bigrams:
+        connection.execute(
+            delete(bigrams_table).where(
+                bigrams_table.c.field == bindparam("b_field"),
+                bigrams_table.c.gram == bindparam("b_gram"),
+                bigrams_table.c.doc == bindparam("b_doc"),
+            ),
+            bigrams,
+        )
+    if indexed:
+        connection.execute(delete(docs_table).where(docs_table.c.doc.in_([doc for doc, _, _ in indexed])))
+
+
+def find_duplicates(session, new_title, new_description, threshold=DUPLICATE_THRESHOLD):
+    new_title, new_description = (new_title or "").lower(), (new_description or "").lower()
+    if new_description == "":
+        return []
+
+    candidates = union(*(
+        _candidates(field, value, threshold) for field, value in enumerate((new_title, new_description))
+    ))
+    rows = session.execute(
+        select(Task.title, Task.description, Task.deadline)
+        .join(TaskSearchDoc, TaskSearchDoc.task_id == Task.id)
+        .where(TaskSearchDoc.doc.in_(candidates), Task.status.in_(SEARCH_STATUSES))
+        .order_by(TaskSearchDoc.doc)
+    ).all()
+
+    duplicates = []
+    for title, description, deadline in rows:
+        title_matcher = SequenceMatcher(None, new_title, (title or "").lower())
+        desc_matcher = SequenceMatcher(None, new_description, (description or "").lower())
+        if _may_reach(title_matcher, threshold) or _may_reach(desc_matcher, threshold):
+            title_similarity, desc_similarity = title_matcher.ratio(), desc_matcher.ratio()
+            if title_similarity >= threshold or desc_similarity >= threshold:
+                duplicates.append((title, description, deadline, title_similarity, desc_similarity))
+    # Первой показываем самую похожую задачу
+    duplicates.sort(key=lambda duplicate: max(duplicate[3], duplicate[4]), reverse=True)
+    return duplicates
+
+
+def _candidates(field, value, threshold):
+    # Все задачи, у которых ratio по полю field может достичь threshold. Если совпало M символов,
+    # ratio = 2M/(a+b). Соседние блоки совпадений SequenceMatcher разделены хотя бы одним
+    # несовпавшим символом, поэтому блоков не больше a+b-2M+1, а блок длины m дает m-1 общих
+    # биграмм. Отсюда общих биграмм (с учетом кратности) не меньше (1.5t - 1)(a+b) - 1.
+    # Для триграмм такая граница при t=0.8 отрицательна, поэтому индекс биграммный
+    column = getattr(TaskSearchDoc, FIELDS[field])
+    length = func.length(func.coalesce(column, ""))
+    shortest = math.ceil(len(value) * threshold / (2 - threshold) - ROUNDING_SLACK)
+    longest = math.floor(len(value) * (2 - threshold) / threshold + ROUNDING_SLACK)
+    per_length = 1.5 * threshold - 1 - ROUNDING_SLACK
+    required = per_length * (len(value) + shortest) - 1
+    if required <= 0:
+        # Похожая строка может не иметь с value ни одной общей биграммы - отбираем по длине.
+        # Длина в SQLite не больше длины строки в нижнем регистре, так что граница точная
+        return select(TaskSearchDoc.doc).where(length <= longest)
+
+    query = func.json_each(bindparam(f"grams_{field}", json.dumps(_bigrams(value)))).table_valued("key", "value")
+    shared = func.sum(func.min(TaskBigram.count, query.c.value)).label("shared")
+    matches = (
+        select(TaskBigram.doc, shared)
+        .select_from(query)
+        .join(TaskBigram, and_(TaskBigram.field == field, TaskBigram.gram == query.c.key))
+        .group_by(TaskBigram.doc)
+        .having(shared >= required)
+        .subquery()
+    )
+    return (
+        select(matches.c.doc)
+        .join(TaskSearchDoc, TaskSearchDoc.doc == matches.c.doc)
+        .where(matches.c.shared >= per_length * (len(value) + length) - 1)
+    )
+
+
+def _may_reach(matcher, threshold):
+    # Верхние границы ratio из difflib: по длинам и по общим символам
+    return matcher.real_quick_ratio() >= threshold and matcher.quick_ratio() >= threshold
+
+
+def _bigrams(value):
+    return Counter(value[i:i + 2] for i in range(len(value) - 1))
+
+
+def _chunks(items):
+    return [items[i:i + CHUNK_SIZE] for i in range(0, len(items), CHUNK_SIZE)]
@@ -1,5 +1,5 @@
 from sqlalchemy import (
-    Column, Integer, String, DateTime, Date, ForeignKey, CheckConstraint
+    Column, Integer, String, DateTime, Date, ForeignKey, CheckConstraint, Index
 )
 from sqlalchemy.orm import declarative_base, relationship
 from datetime import datetime, timezone
@@ -18,6 +18,12 @@ class TaskType(Base):
 
 class Task(Base):
     __tablename__ = "tasks"
+    # (status, deadline) - поиск просроченных в update_tasks_status, updated_at - отправка изменений
+    # при синхронизации; выборки для окон идут из TaskStore в памяти
+    __table_args__ = (
+        Index("ix_tasks_status_deadline", "status", "deadline"),
+        Index("ix_tasks_updated_at", "updated_at"),
+    )
 
     id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     title = Column(String, nullable=False)
@@ -42,6 +48,36 @@ class Task(Base):
     task_type = relationship("TaskType", back_populates="tasks")
 
 
+class TaskChange(Base):
+    __tablename__ = "task_changes"
+
+    # field="*" - задача еще ни разу не отправлялась на сервер целиком
+    task_id = Column(String(36), primary_key=True)
+    field = Column(String, primary_key=True)
+
+
+class TaskSearchDoc(Base):
+    __tablename__ = "task_search_docs"
+
+    # Явный целочисленный ключ для task_bigrams; title и description - текст на момент индексации,
+    # по нему local_db/dup_index.py находит устаревшие записи
+    doc = Column(Integer, primary_key=True)
+    task_id = Column(String(36), unique=True, nullable=False)
+    title = Column(String)
+    description = Column(String)
+
+
+class TaskBigram(Base):
+    __tablename__ = "task_bigrams"
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    # field: 0 - title, 1 - description; count - число вхождений биграммы в строку в нижнем регистре
+    field = Column(Integer, primary_key=True)
+    gram = Column(String, primary_key=True)
+    doc = Column(Integer, primary_key=True)
+    count = Column(Integer, nullable=False)
+
+
 class DailyStats(Base):
     __tablename__ = "daily_stats"
 
@@ -0,0 +1,148 @@
+import heapq
+from datetime import datetime, timezone, date as dt_date
+
+from PyQt6.QtCore import QObject, pyqtSignal
+from sqlalchemy import select
+
+from local_db.data_manager import Session
+from local_db.models import Task, TaskType
+
+PRIORITY_RANK = {"Casual": 1, "Low": 2, "Mid": 3, "High": 4, "Extreme": 5}
+# Столько задач дешевле перечитать целиком, чем обновлять по одной (первая синхронизация)
+BULK_REFRESH = 500
+EPOCH = datetime(1970, 1, 1)
+
+
+class TaskStore(QObject):
+    # Рабочий набор задач в памяти: экраны читают отсюда и перерисовываются по сигналам,
+    # а не перечитывают SQLite при каждом переключении
+    task_added = pyqtSignal(str)
+    task_updated = pyqtSignal(str)
+    reloaded = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+        # Задачи загружаются первым reload(), уже после отрисовки окна
+        self.loaded = False
+        self._clear()
+
+    def _clear(self):
+        self.tasks = {}
+        # Индексы хранят id в словарях, чтобы сохранялся порядок загрузки
+        self.by_status = {}
+        self.by_date = {}
+        self.by_type = {}
+        # Суммы по задачам в работе для capacity_features: число задач с каждым рангом приоритета
+        # и сумма дедлайнов в секундах от EPOCH
+        self.underway_ranks = dict.fromkeys(PRIORITY_RANK.values(), 0)
+        self.underway_deadlines = 0.0
+
+    def _query(self):
+        return (
+            select(Task.id, Task.title, Task.description, Task.deadline, Task.status,
+                   Task.final_priority, TaskType.name.label("task_type"))
+            .outerjoin(TaskType, Task.task_type_id == TaskType.id)
+            .order_by(Task.created_at)
+        )
+
+    def reload(self):
+        session = Session()
+        rows = session.execute(self._query()).all()
+        session.close()
+
+        self._clear()
+        for row in rows:
+            self._index(row)
+        self.loaded = True
+        self.reloaded.emit()
+
+    def refresh_task(self, task_id):
+        self.refresh_tasks([task_id])
+
+    def refresh_tasks(self, task_ids):
+        # До первой загрузки обновлять нечего: reload() прочитает эти задачи вместе с остальными
+        if not task_ids or not self.loaded:
+            return
+        if len(task_ids) > BULK_REFRESH:
+            self.reload()
+            return
+        session = Session()
+        rows = {row.id: row for row in session.execute(self._query().where(Task.id.in_(task_ids))).all()}
+        session.close()
+
+        for task_id in task_ids:
+            known = task_id in self.tasks
+            if known:
+                self._unindex(self.tasks.pop(task_id))
+            if task_id in rows:
+                self._index(rows[task_id])
+            # Удаленная задача приходит как обновление: представления просто убирают ее
+            if known or task_id in rows:
+                (self.task_updated if known else self.task_added).emit(task_id)
+
+    def _index(self, row):
+        self.tasks[row.id] = row
+        self.by_status.setdefault(row.status, {})[row.id] = None
+        self.by_date.setdefault(row.deadline.date(), {})[row.id] = None
+        self.by_type.setdefault(row.task_type, {})[row.id] = None
+        self._count_underway(row, 1)
+
+    def _unindex(self, row):
+        self._count_underway(row, -1)
+        for index, key in ((self.by_status, row.status), (self.by_date, row.deadline.date()),
+                           (self.by_type, row.task_type)):
+            ids = index.get(key)
+            if ids is not None:
+                ids.pop(row.id, None)
+                if not ids:
+                    del index[key]
+
+    def _count_underway(self, row, sign):
+        if row.status != "underway":
+            return
+        if row.final_priority in PRIORITY_RANK:
+            self.underway_ranks[PRIORITY_RANK[row.final_priority]] += sign
+        self.underway_deadlines += sign * (row.deadline - EPOCH).total_seconds()
+
+    def get(self, task_id):
+        return self.tasks.get(task_id)
+
+    def with_status(self, *statuses):
+        return [self.tasks[task_id] for status in statuses for task_id in self.by_status.get(status, ())]
+
+    def on_date(self, day):
+        return [self.tasks[task_id] for task_id in self.by_date.get(day, ())]
+
+    def closest(self, limit=3):
+        today = datetime.combine(dt_date.today(), datetime.min.time())
+        candidates = (task for task in self.with_status("underway") if task.deadline >= today)
+        return heapq.nsmallest(limit, candidates, key=lambda task: task.deadline)
+
+    def capacity_features(self):
+        # Признаки модели нагрузки: активные задачи, средний и максимальный приоритет,
+        # среднее число часов до дедлайна и число просроченных; считаются по суммам из _index
+        active = len(self.by_status.get("underway", ()))
+        if not active:
+            return 0, 0, 0, 0, 0
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        ranked = sum(self.underway_ranks.values())
+        hours = (self.underway_deadlines / active - (now - EPOCH).total_seconds()) / 3600
+        return (
+            active,
+            sum(rank * count for rank, count in self.underway_ranks.items()) / ranked if ranked else 0,
+            max((rank for rank, count in self.underway_ranks.items() if count), default=0),
+            int(hours),
+            len(self.by_status.get("overdue", ())),
+        )
+
+    def count_by_type(self, status=None):
+        counts = {}
+        for task_type, ids in self.by_type.items():
+            if task_type is None:
+                continue
+            count = len(ids) if status is None else sum(self.tasks[i].status == status for i in ids)
+            if count:
+                counts[task_type] = count
+        types = sorted(counts)
+        return types, [counts[t] for t in types]
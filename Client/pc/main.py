@@ -1,13 +1,76 @@
-from local_db.data_manager import init_db, daily_insert, update_tasks_status
-from ui.app_manager import run_app
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+PROFILE_FLAG = "--profile-startup"
+
+
+class StartupProfile:
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        yield
+        self.phases.append((name, time.perf_counter() - start))
+
+    def mark(self, name, start):
+        self.phases.append((name, time.perf_counter() - start))
+
+    def report(self):
+        total = time.perf_counter() - self.started
+        print("Профиль запуска:")
+        for name, seconds in self.phases:
+            print(f"  {name:<24}{seconds * 1000:9.1f} ms")
+        print(f"  {'итого':<24}{total * 1000:9.1f} ms")
+
 
 def main():
+    profile = StartupProfile(PROFILE_FLAG in sys.argv)
+    if profile.enabled:
+        sys.argv.remove(PROFILE_FLAG)
+
     print("Запуск системы управления продуктивностью...")
-    init_db()
-    daily_insert()
-    update_tasks_status()
+    with profile.phase("import local_db"):
+        from local_db.data_manager import init_db, daily_insert, update_tasks_status, operation_timings
+    with profile.phase("init_db"):
+        init_db()
+    with profile.phase("import ui"):
+        from ui.app_manager import create_application, create_manager
+    with profile.phase("QApplication"):
+        app = create_application()
+    with profile.phase("окно"):
+        manager = create_manager()
+        manager.show()
+    shown = time.perf_counter()
+
+    def after_first_paint():
+        profile.mark("первая отрисовка", shown)
+        # Обслуживание базы и модели не задерживают появление окна
+        with profile.phase("daily_insert + статусы"):
+            daily_insert()
+            overdue_ids = update_tasks_status()
+        with profile.phase("задачи + графики"):
+            manager.refresh_main_window(overdue_ids)
+
+        from ml.load import warm_up
+        if not profile.enabled:
+            threading.Thread(target=warm_up, daemon=True).start()
+            return
+
+        with profile.phase("warm_up (в фоне)"):
+            warm_up()
+        profile.report()
+        for name, timing in operation_timings().items():
+            print(f"  db: {name:<20}{timing['calls']:4d} x {timing['avg_ms']:7.1f} ms")
+        app.quit()
 
-    run_app()
+    manager.first_painted.connect(after_first_paint)
+    sys.exit(app.exec())
 
 if __name__ == "__main__":
     main()
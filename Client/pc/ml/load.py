@@ -1,9 +1,12 @@
-import onnxruntime as rt
+import json
 import pickle
 import numpy as np
-from datetime import datetime,timedelta, timezone
+from datetime import datetime
 import sys
 import os
+import threading
+from ml import numpy_models, preprocessing
+from ml.working_hours import calculate_working_hours_array, working_hours_between
 
 def get_path(relative_path):
     if getattr(sys, 'frozen', False):
@@ -15,14 +18,88 @@ def get_path(relative_path):
     return os.path.normpath(os.path.join(base_path, relative_path))
 
 
-def predict_capacity(active_tasks, avg_priority, max_priority, avg_hours_to_deadline, overdue_tasks):
-    model_path = get_path("ml/TaskLoad/tlm.onnx")
-    scaler_path = get_path("ml/TaskLoad/tlm_scalers.pkl")
+MODEL_FILES = {
+    "capacity": {
+        "onnx": "ml/TaskLoad/tlm.onnx",
+        "weights": "ml/TaskLoad/tlm_weights.json",
+        "params": "ml/TaskLoad/tlm_scalers.json",
+        "params_pkl": "ml/TaskLoad/tlm_scalers.pkl",
+    },
+    "priority": {
+        "onnx": "ml/TaskPriority/dualhead_tpm.onnx",
+        "weights": "ml/TaskPriority/dualhead_tpm_weights.json",
+        "params": "ml/TaskPriority/dualhead_tpm_encoders.json",
+        "params_pkl": "ml/TaskPriority/dualhead_tpm_encoders.pkl",
+    },
+}
+
+NUMPY_MODELS = {
+    "capacity": numpy_models.TaskLoad,
+    "priority": numpy_models.DualHeadPriority,
+}
+
+PARAMS_LOADERS = {
+    "capacity": preprocessing.load_capacity_scalers,
+    "priority": preprocessing.load_priority_encoders,
+}
+
+
+def _read_ml_backend():
+    try:
+        with open(get_path("config.json"), "r", encoding="utf-8") as f:
+            return json.load(f).get("ml_backend", "auto")
+    except FileNotFoundError:
+        return "auto"
+
+
+# "numpy", "onnx" или "auto" - numpy, если рядом с моделью лежат веса в JSON
+ML_BACKEND = _read_ml_backend()
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_model(name):
+    # Сессия и энкодеры загружаются один раз на процесс; InferenceSession.run потокобезопасен
+    model = _models.get(name)
+    if model is None:
+        with _models_lock:
+            model = _models.get(name)
+            if model is None:
+                model = (_load_session(name), _load_params(name))
+                _models[name] = model
+    return model
+
+
+def _load_session(name):
+    weights_path = get_path(MODEL_FILES[name]["weights"])
+    if ML_BACKEND == "numpy" or (ML_BACKEND == "auto" and os.path.exists(weights_path)):
+        return NUMPY_MODELS[name](numpy_models.load_layers(weights_path))
+
+    import onnxruntime as rt
+    return rt.InferenceSession(get_path(MODEL_FILES[name]["onnx"]))
+
+
+def _load_params(name):
+    # JSON не тянет за собой sklearn; pickle остается для старых сборок без JSON
+    params_path = get_path(MODEL_FILES[name]["params"])
+    if os.path.exists(params_path):
+        return PARAMS_LOADERS[name](params_path)
+
+    with open(get_path(MODEL_FILES[name]["params_pkl"]), "rb") as f:
+        return pickle.load(f)
+
 
-    ort_session = rt.InferenceSession(model_path)
+def warm_up():
+    for name in MODEL_FILES:
+        try:
+            get_model(name)
+        except Exception as e:
+            print(f"Не удалось загрузить модель {name}: {e}")
 
-    with open(scaler_path, "rb") as f:
-        scalers = pickle.load(f)
+
+def predict_capacity(active_tasks, avg_priority, max_priority, avg_hours_to_deadline, overdue_tasks):
+    ort_session, scalers = get_model("capacity")
 
     active_tasks_scaler = scalers["active_tasks_scaler"]
     avg_priority_scaler = scalers["avg_priority_scaler"]
@@ -44,13 +121,7 @@ def predict_capacity(active_tasks, avg_priority, max_priority, avg_hours_to_dead
     return int(pred)
 
 def predict_priority(task_type,deadline,urgency):
-    model_path = get_path("ml/TaskPriority/dualhead_tpm.onnx")
-    encoder_path = get_path("ml/TaskPriority/dualhead_tpm_encoders.pkl")
-
-    ort_session = rt.InferenceSession(model_path)
-
-    with open(encoder_path, "rb") as f:
-        encoders = pickle.load(f)
+    ort_session, encoders = get_model("priority")
 
     task_type_encoder = encoders["task_type_encoder"]
     hours_scaler = encoders["hours_scaler"]
@@ -74,35 +145,29 @@ def predict_priority(task_type,deadline,urgency):
     return predicted_priority
 
 
-def calculate_working_hours(deadline_str):
-    WORK_START = 10
-    WORK_END = 18
-    now = datetime.now()
-    deadline = datetime.strptime(deadline_str, "%Y-%m-%d")
-    if deadline <= now:
-        return 0
-    total_working_hours = 0
-    current_time = now
-    while current_time.date() < deadline.date() or (current_time.date() == deadline.date() and current_time.hour < deadline.hour):
-        if current_time.weekday() >= 5:
-            current_time += timedelta(days=1)
-            current_time = current_time.replace(hour=WORK_START, minute=0, second=0, microsecond=0)
-            continue
-        if current_time.hour < WORK_START:
-            current_time = current_time.replace(hour=WORK_START, minute=0, second=0, microsecond=0)
-        if current_time.hour >= WORK_END:
-            current_time += timedelta(days=1)
-            current_time = current_time.replace(hour=WORK_START, minute=0, second=0, microsecond=0)
-            continue
-        end_of_day = current_time.replace(hour=WORK_END, minute=0, second=0, microsecond=0)
-        hours_to_end_of_day = max(0, (end_of_day - current_time).total_seconds() / 3600)
-        if current_time.date() == deadline.date():
-            hours_to_deadline = max(0, (deadline - current_time).total_seconds() / 3600)
-            total_working_hours += min(hours_to_deadline, hours_to_end_of_day)
-            break
-        total_working_hours += hours_to_end_of_day
-        current_time += timedelta(days=1)
-        current_time = current_time.replace(hour=WORK_START, minute=0, second=0, microsecond=0)
-    return round(total_working_hours, 2)
+def predict_priority_batch(task_types, deadlines, urgencies):
+    if len(task_types) == 0:
+        return []
+    ort_session, encoders = get_model("priority")
+
+    task_type_encoder = encoders["task_type_encoder"]
+    hours_scaler = encoders["hours_scaler"]
+    urgency_scaler = encoders["urgency_scaler"]
+    priority_encoder = encoders["priority_encoder"]
+
+    hours_left = calculate_working_hours_array(deadlines).reshape(-1, 1)
+
+    task_types_encoded = task_type_encoder.transform(np.array(task_types).reshape(-1, 1))
+    hours_scaled = hours_scaler.transform(hours_left)
+    x1 = np.hstack([task_types_encoded, hours_scaled]).astype(np.float32)
 
+    x2 = urgency_scaler.transform(np.array(urgencies, dtype=np.float64).reshape(-1, 1)).astype(np.float32)
 
+    outputs = ort_session.run(None, {"input1": x1, "input2": x2})
+    pred_idx = np.argmax(outputs[0], axis=1)
+    return [str(priority) for priority in priority_encoder.inverse_transform(pred_idx)]
+
+
+def calculate_working_hours(deadline_str, now=None):
+    deadline = datetime.strptime(deadline_str, "%Y-%m-%d")
+    return working_hours_between(now or datetime.now(), deadline)
@@ -0,0 +1,43 @@
+import json
+import numpy as np
+
+
+def load_layers(path):
+    with open(path, "r", encoding="utf-8") as f:
+        layers = json.load(f)
+
+    return {
+        name: {param: np.asarray(value, dtype=np.float32) for param, value in params.items()}
+        for name, params in layers.items()
+    }
+
+
+def _linear(x, layer):
+    return x @ layer["weight"].T + layer["bias"]
+
+
+def _relu(x):
+    return np.maximum(x, 0)
+
+
+# Прямой проход моделей из ml_service в режиме eval (Dropout отключен).
+# Интерфейс run() совпадает с onnxruntime.InferenceSession
+class DualHeadPriority:
+    def __init__(self, layers):
+        self.layers = layers
+
+    def run(self, output_names, input_feed):
+        h1 = _relu(_linear(input_feed["input1"], self.layers["head1.0"]))
+        h2 = _relu(_linear(input_feed["input2"], self.layers["head2.0"]))
+        h = _relu(_linear(np.concatenate([h1, h2], axis=1), self.layers["fusion.0"]))
+        return [_linear(h, self.layers["fusion.3"])]
+
+
+class TaskLoad:
+    def __init__(self, layers):
+        self.layers = layers
+
+    def run(self, output_names, input_feed):
+        h = _relu(_linear(input_feed["input"], self.layers["net.0"]))
+        h = _relu(_linear(h, self.layers["net.3"]))
+        return [_linear(h, self.layers["net.6"]).squeeze(-1)]
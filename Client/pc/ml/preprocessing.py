@@ -0,0 +1,59 @@
+import json
+import numpy as np
+
+
+# Замена sklearn-трансформеров по параметрам из preproc/json_convertor.py.
+# transform/inverse_transform повторяют поведение StandardScaler, MinMaxScaler,
+# OneHotEncoder и LabelEncoder на тех данных, которые использует клиент
+class Scaler:
+    def __init__(self, params):
+        self.kind = params["type"]
+        self.scale = np.asarray(params["scale"], dtype=np.float64)
+        self.offset = np.asarray(params["mean"] if self.kind == "standard" else params["min"], dtype=np.float64)
+
+    def transform(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if self.kind == "standard":
+            return (X - self.offset) / self.scale
+        return X * self.scale + self.offset
+
+
+class OneHot:
+    def __init__(self, mapping):
+        self.mapping = mapping
+
+    def transform(self, X):
+        values = np.asarray(X).reshape(-1)
+        encoded = np.zeros((len(values), len(self.mapping)), dtype=np.float64)
+        for row, value in enumerate(values):
+            if value not in self.mapping:
+                raise ValueError(f"Unknown category: {value}")
+            encoded[row, self.mapping[value]] = 1.0
+        return encoded
+
+
+class Labels:
+    def __init__(self, labels):
+        self.labels = np.asarray(labels)
+
+    def inverse_transform(self, indices):
+        return self.labels[np.asarray(indices, dtype=np.int64)]
+
+
+def _read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_priority_encoders(path):
+    params = _read(path)
+    return {
+        "task_type_encoder": OneHot(params["task_type_mapping"]),
+        "hours_scaler": Scaler(params["hours_scaler"]),
+        "urgency_scaler": Scaler(params["urgency_scaler"]),
+        "priority_encoder": Labels(params["priority_labels"])
+    }
+
+
+def load_capacity_scalers(path):
+    return {f"{name}_scaler": Scaler(params) for name, params in _read(path).items()}
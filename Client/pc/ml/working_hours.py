@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Рабочие часы до дедлайна - признак модели приоритета. Клиент считает его при предсказании,
+# скрипты Backend/ml_service - при генерации обучающих данных, поэтому формула одна
+WORK_START = 10
+WORK_END = 18
+
+
+def working_hours_between(now, deadline):
+    # Повторяет прежний обход по дням: в день дедлайна часы считаются, только если
+    # текущий час меньше часа дедлайна, а при приходе в этот день с утра - с 10:00
+    if deadline <= now:
+        return 0
+
+    day = timedelta(hours=WORK_END - WORK_START)
+    start = max(now, now.replace(hour=WORK_START, minute=0, second=0, microsecond=0))
+    end_of_day = now.replace(hour=WORK_END, minute=0, second=0, microsecond=0)
+
+    if now.date() == deadline.date():
+        if now.weekday() >= 5 or now.hour >= WORK_END or now.hour >= deadline.hour:
+            return 0
+        total = min(max(timedelta(0), deadline - start), end_of_day - start)
+        return round(total.total_seconds() / 3600, 2)
+
+    total = timedelta(0)
+    if now.weekday() < 5 and now.hour < WORK_END:
+        total += end_of_day - start
+
+    total += day * int(np.busday_count(now.date() + timedelta(days=1), deadline.date()))
+
+    if deadline.weekday() < 5 and deadline.hour > WORK_START:
+        total += min(deadline - deadline.replace(hour=WORK_START, minute=0, second=0, microsecond=0), day)
+
+    return round(total.total_seconds() / 3600, 2)
+
+
+def calculate_working_hours_array(deadlines, now=None):
+    deadlines = np.asarray(deadlines, dtype="datetime64[us]")
+    now = np.datetime64(now or datetime.now(), "us")
+    hour = np.timedelta64(1, "h")
+    day = np.timedelta64(WORK_END - WORK_START, "h")
+    zero = np.timedelta64(0, "us")
+
+    start_day = now.astype("datetime64[D]")
+    deadline_days = deadlines.astype("datetime64[D]")
+    now_hour = (now - start_day) // hour
+    deadline_hours = (deadlines - deadline_days) // hour
+
+    start = max(now, start_day + np.timedelta64(WORK_START, "h"))
+    end_of_day = start_day + np.timedelta64(WORK_END, "h")
+    first_day_open = bool(np.is_busday(start_day)) and now_hour < WORK_END
+
+    busdays = np.maximum(np.busday_count(start_day + 1, deadline_days), 0)
+    last_day = np.where(
+        np.is_busday(deadline_days) & (deadline_hours > WORK_START),
+        np.minimum(deadlines - (deadline_days + np.timedelta64(WORK_START, "h")), day),
+        zero
+    )
+    total = (end_of_day - start if first_day_open else zero) + day * busdays + last_day
+
+    same_day = np.where(
+        first_day_open & (now_hour < deadline_hours),
+        np.minimum(np.maximum(deadlines - start, zero), end_of_day - start),
+        zero
+    )
+    total = np.where(deadline_days == start_day, same_day, total)
+    total = np.where(deadlines <= now, zero, total)
+    return np.round(total / np.timedelta64(1, "s") / 3600, 2)
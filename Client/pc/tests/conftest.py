@@ -0,0 +1,53 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from local_db import data_manager
+from local_db.models import TaskType
+
+TASK_TYPES = ["Other", "Meeting", "Documentation", "Code Bug Fix"]
+
+# Слои в порядке torch.nn.Sequential из ml_service: (имя, вход, выход)
+ARCHITECTURES = {
+    "priority": [("head1.0", 11, 64), ("head2.0", 1, 64), ("fusion.0", 128, 64), ("fusion.3", 64, 5)],
+    "capacity": [("net.0", 5, 64), ("net.3", 64, 64), ("net.6", 64, 1)],
+}
+
+
+def random_layers(name, rng):
+    return {
+        layer: {
+            "weight": rng.normal(0, 0.5, (outputs, inputs)).astype(np.float32),
+            "bias": rng.normal(0, 0.5, outputs).astype(np.float32),
+        }
+        for layer, inputs, outputs in ARCHITECTURES[name]
+    }
+
+
+class StoredSettings(dict):
+    # Замена QSettings, чтобы тесты синхронизации не трогали настройки пользователя
+    def value(self, key, default=None):
+        return self.get(key, default)
+
+    def setValue(self, key, value):
+        self[key] = value
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    # Каждый тест получает свою базу: модульный engine и Session перенастраиваются на временный файл
+    engine = create_engine(f"sqlite:///{tmp_path / 'SPS.db'}", connect_args={"check_same_thread": False})
+    original_bind = data_manager.Session.kw.get("bind")
+    monkeypatch.setattr(data_manager, "engine", engine)
+    data_manager.Session.configure(bind=engine)
+    data_manager._migrate_schema()
+    with data_manager.unit_of_work("test_setup") as session:
+        session.add_all([TaskType(name=name) for name in TASK_TYPES])
+    yield engine
+    data_manager.Session.configure(bind=original_bind)
+    engine.dispose()
@@ -0,0 +1,62 @@
+import os
+import sqlite3
+from datetime import date as dt_date
+
+from sqlalchemy import create_engine
+
+from local_db import data_manager
+from local_db.models import DailyStats, Task
+
+
+def _today_stats():
+    session = data_manager.Session()
+    stats = session.get(DailyStats, dt_date.today())
+    session.close()
+    return stats
+
+
+def test_create_task_without_today_stats_counts_task_once(db):
+    for number in range(3):
+        data_manager.create_task(f"task {number}", "desc", "Meeting", 1, 1, "2030-01-01", "Mid")
+
+    stats = _today_stats()
+    assert (stats.total_tasks, stats.in_progress_tasks) == (3, 3)
+
+
+def test_create_task_after_daily_insert(db):
+    data_manager.create_task("first", "desc", "Meeting", 1, 1, "2030-01-01", "Mid")
+    data_manager.daily_insert()
+    data_manager.create_task("second", "desc", "Other", 1, 1, "2030-01-02", "Low")
+
+    stats = _today_stats()
+    assert (stats.total_tasks, stats.in_progress_tasks) == (2, 2)
+
+
+def test_complete_task_moves_counter(db):
+    task_id = data_manager.create_task("task", "desc", "Meeting", 1, 1, "2030-01-01", "Mid")
+    data_manager.save_task_edit(task_id, "2030-01-01", "completed", "Mid", "Meeting")
+
+    stats = _today_stats()
+    assert (stats.total_tasks, stats.in_progress_tasks, stats.completed_tasks) == (1, 0, 1)
+    session = data_manager.Session()
+    assert session.get(Task, task_id).status == "completed"
+    session.close()
+
+
+def test_delete_database_removes_wal_files(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "SPS.db")
+    engine = create_engine(f"sqlite:///{db_path}")
+    monkeypatch.setattr(data_manager, "engine", engine)
+    connection = engine.raw_connection()
+    connection.execute("PRAGMA journal_mode=wal")
+    connection.execute("CREATE TABLE t (x)")
+    connection.commit()
+    # Соединение потока синхронизации еще открыто, поэтому закрытие первого не убирает -wal и -shm
+    other = sqlite3.connect(db_path)
+    other.execute("SELECT * FROM t").fetchall()
+    connection.close()
+    assert os.path.exists(db_path + "-wal")
+
+    data_manager.delete_database(db_path)
+    other.close()
+    assert not any(os.path.exists(db_path + suffix) for suffix in ("", "-wal", "-shm"))
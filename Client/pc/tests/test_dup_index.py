@@ -0,0 +1,116 @@
+import random
+import uuid
+from datetime import datetime
+from difflib import SequenceMatcher
+
+import pytest
+from sqlalchemy import insert, select, update
+
+from local_db import data_manager
+from local_db.dup_index import DUPLICATE_THRESHOLD, SEARCH_STATUSES, create_dup_index, find_duplicates
+from local_db.models import Task, TaskSearchDoc
+
+DEADLINE = datetime(2030, 1, 1)
+
+
+def add_tasks(tasks):
+    with data_manager.unit_of_work("test_add_tasks") as session:
+        session.add_all([
+            Task(id=str(uuid.uuid4()), title=title, description=description, deadline=DEADLINE, status=status)
+            for title, description, status in tasks
+        ])
+
+
+def search(title, description):
+    with data_manager.Session() as session:
+        return {(found[0], found[1]) for found in find_duplicates(session, title, description)}
+
+
+def full_scan(title, description):
+    # Поиск без индекса - так работало окно задачи до индекса
+    title, description = title.lower(), description.lower()
+    if description == "":
+        return set()
+    with data_manager.Session() as session:
+        rows = session.execute(select(Task.title, Task.description).where(Task.status.in_(SEARCH_STATUSES))).all()
+    return {
+        (row_title, row_description) for row_title, row_description in rows
+        if SequenceMatcher(None, title, (row_title or "").lower()).ratio() >= DUPLICATE_THRESHOLD
+        or SequenceMatcher(None, description, (row_description or "").lower()).ratio() >= DUPLICATE_THRESHOLD
+    }
+
+
+@pytest.mark.parametrize("title, other", [
+    ("abcdefghij", "abcxefgyij"),
+    # ratio 0.857 без единой общей триграммы
+    ("abcdef", "abxcdyef"),
+])
+def test_finds_duplicate_with_few_shared_grams(db, title, other):
+    add_tasks([(other, "unrelated text", "underway")])
+    assert SequenceMatcher(None, title, other).ratio() >= DUPLICATE_THRESHOLD
+    assert search(title, "something else") == {(other, "unrelated text")}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_full_scan(db, seed):
+    rng = random.Random(seed)
+    # Маленький алфавит дает много строк около порога
+    def word():
+        return "".join(rng.choice("abcdу ") for _ in range(rng.randint(0, 14)))
+
+    def mutate(value):
+        chars = list(value)
+        for _ in range(rng.randint(0, 3)):
+            position = rng.randint(0, len(chars))
+            action = rng.choice(("insert", "delete", "replace"))
+            if action == "insert":
+                chars.insert(position, rng.choice("abcdУ "))
+            elif chars and position < len(chars):
+                if action == "delete":
+                    del chars[position]
+                else:
+                    chars[position] = rng.choice("abcdУ ")
+        return "".join(chars)
+
+    tasks = [(word(), word(), rng.choice(("underway", "overdue", "completed"))) for _ in range(150)]
+    add_tasks(tasks)
+    for title, description, _ in rng.sample(tasks, 40):
+        query = (mutate(title), mutate(description) or "x")
+        assert search(*query) == full_scan(*query)
+
+
+def test_edited_task_is_reindexed(db):
+    add_tasks([("first title", "first description", "underway")])
+    with data_manager.unit_of_work("test_edit") as session:
+        session.scalars(select(Task)).one().title = "second title"
+
+    assert search("second title", "other") == {("second title", "first description")}
+    assert search("first title", "other") == set()
+
+
+def test_completed_task_leaves_index(db):
+    add_tasks([("done title", "done description", "underway")])
+    with data_manager.unit_of_work("test_complete") as session:
+        session.scalars(select(Task)).one().status = "completed"
+
+    with data_manager.Session() as session:
+        assert session.scalars(select(TaskSearchDoc)).all() == []
+
+
+def test_startup_rebuilds_stale_index(db):
+    add_tasks([("indexed title", "indexed description", "underway")])
+    with db.begin() as connection:
+        # Записи в обход сессий приложения индекс не видит
+        connection.execute(update(Task).values(title="changed title"))
+        connection.execute(insert(Task).values(
+            id=str(uuid.uuid4()), title="changed title", description="completed", deadline=DEADLINE, status="completed"
+        ))
+        connection.execute(insert(Task).values(
+            id=str(uuid.uuid4()), title="raw title", description="raw description", deadline=DEADLINE, status="underway"
+        ))
+        create_dup_index(connection)
+
+    assert search("changed title", "other") == {("changed title", "indexed description")}
+    assert search("raw title", "other") == {("raw title", "raw description")}
+    with data_manager.Session() as session:
+        assert sorted(session.scalars(select(TaskSearchDoc.title))) == ["changed title", "raw title"]
@@ -0,0 +1,87 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from conftest import random_layers
+from ml import load, numpy_models
+
+onnx = pytest.importorskip("onnx")
+rt = pytest.importorskip("onnxruntime")
+from onnx import TensorProto, helper, numpy_helper
+
+def onnx_session(name, layers):
+    # Граф того же вида, что дает torch.onnx.export: Linear - это Gemm с transB=1
+    initializers, nodes = [], []
+
+    def linear(x, layer, relu=True):
+        for param in ("weight", "bias"):
+            initializers.append(numpy_helper.from_array(layers[layer][param], f"{layer}.{param}"))
+        nodes.append(helper.make_node("Gemm", [x, f"{layer}.weight", f"{layer}.bias"], [f"{layer}.out"], transB=1))
+        if not relu:
+            return f"{layer}.out"
+        nodes.append(helper.make_node("Relu", [f"{layer}.out"], [f"{layer}.relu"]))
+        return f"{layer}.relu"
+
+    if name == "priority":
+        inputs = [
+            helper.make_tensor_value_info("input1", TensorProto.FLOAT, ["batch", 11]),
+            helper.make_tensor_value_info("input2", TensorProto.FLOAT, ["batch", 1]),
+        ]
+        nodes.append(helper.make_node("Concat", [linear("input1", "head1.0"), linear("input2", "head2.0")], ["h"], axis=1))
+        nodes.append(helper.make_node("Identity", [linear(linear("h", "fusion.0"), "fusion.3", relu=False)], ["output"]))
+        output = helper.make_tensor_value_info("output", TensorProto.FLOAT, ["batch", 5])
+    else:
+        inputs = [helper.make_tensor_value_info("input", TensorProto.FLOAT, ["batch", 5])]
+        out = linear(linear(linear("input", "net.0"), "net.3"), "net.6", relu=False)
+        initializers.append(numpy_helper.from_array(np.array([-1], dtype=np.int64), "axes"))
+        nodes.append(helper.make_node("Squeeze", [out, "axes"], ["output"]))
+        output = helper.make_tensor_value_info("output", TensorProto.FLOAT, ["batch"])
+
+    graph = helper.make_graph(nodes, name, inputs, [output], initializers)
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 8
+    return rt.InferenceSession(model.SerializeToString())
+
+
+def fixed_inputs(name, rng, batch=64):
+    if name == "priority":
+        return {"input1": rng.normal(0, 1, (batch, 11)).astype(np.float32),
+                "input2": rng.normal(0, 1, (batch, 1)).astype(np.float32)}
+    return {"input": rng.normal(0, 1, (batch, 5)).astype(np.float32)}
+
+
+@pytest.mark.parametrize("name", ["priority", "capacity"])
+def test_numpy_backend_matches_onnx_graph(tmp_path, name):
+    rng = np.random.default_rng(0)
+    layers = random_layers(name, rng)
+    # Веса проходят через тот же JSON, что пишет preproc/weights_convertor.py
+    path = tmp_path / "weights.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({layer: {param: value.tolist() for param, value in params.items()} for layer, params in layers.items()}, f)
+
+    feed = fixed_inputs(name, rng)
+    expected = onnx_session(name, layers).run(None, feed)[0]
+    actual = load.NUMPY_MODELS[name](numpy_models.load_layers(path)).run(None, feed)[0]
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, rtol=1e-5, atol=1e-5)
+
+
+@pytest.mark.parametrize("name", ["priority", "capacity"])
+def test_numpy_backend_matches_shipped_onnx(name):
+    files = load.MODEL_FILES[name]
+    onnx_path, weights_path = load.get_path(files["onnx"]), load.get_path(files["weights"])
+    if not (os.path.exists(onnx_path) and os.path.exists(weights_path)):
+        pytest.skip("файлы модели не лежат рядом с клиентом")
+
+    session = rt.InferenceSession(onnx_path)
+    feed = {
+        model_input.name: np.random.default_rng(1).normal(0, 1, (64, model_input.shape[1])).astype(np.float32)
+        for model_input in session.get_inputs()
+    }
+    expected = session.run(None, feed)[0]
+    actual = load.NUMPY_MODELS[name](numpy_models.load_layers(weights_path)).run(None, feed)[0]
+    np.testing.assert_allclose(actual, expected, rtol=1e-4, atol=1e-4)
+    if name == "priority":
+        assert (actual.argmax(axis=1) == expected.argmax(axis=1)).all()
@@ -0,0 +1,102 @@
+import json
+import os
+import pickle
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from ml import load, preprocessing
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "Backend" / "ml_service" / "preproc"))
+
+sklearn_preprocessing = pytest.importorskip("sklearn.preprocessing")
+json_convertor = pytest.importorskip("json_convertor")
+
+TASK_TYPES = ["Other", "Meeting", "Documentation", "Code Bug Fix", "Research"]
+PRIORITIES = ["Casual", "Low", "Mid", "High", "Extreme"]
+CAPACITY_FEATURES = ["active_tasks", "avg_priority", "max_priority", "avg_hours_to_deadline", "overdue_tasks"]
+
+
+def dump_and_load(tmp_path, fitted, export, loader):
+    # Тот же путь, что у моделей: pickle из обучения и JSON из json_convertor
+    with open(tmp_path / "params.pkl", "wb") as f:
+        pickle.dump(fitted, f)
+    with open(tmp_path / "params.pkl", "rb") as f:
+        from_pickle = pickle.load(f)
+    with open(tmp_path / "params.json", "w", encoding="utf-8") as f:
+        json.dump(export(from_pickle), f)
+    return from_pickle, loader(tmp_path / "params.json")
+
+
+def assert_same_transforms(from_pickle, from_json, inputs):
+    for name, values in inputs.items():
+        np.testing.assert_allclose(from_json[name].transform(values), from_pickle[name].transform(values), rtol=1e-12)
+
+
+@pytest.mark.parametrize("scaler", ["StandardScaler", "MinMaxScaler"])
+def test_priority_encoders_json_matches_pickle(tmp_path, scaler):
+    rng = np.random.default_rng(0)
+    hours = rng.uniform(0, 500, (200, 1))
+    urgency = rng.integers(0, 21, (200, 1)).astype(np.float64)
+    fitted = {
+        "task_type_encoder": sklearn_preprocessing.OneHotEncoder(sparse_output=False).fit(np.array(TASK_TYPES).reshape(-1, 1)),
+        "hours_scaler": getattr(sklearn_preprocessing, scaler)().fit(hours),
+        "urgency_scaler": getattr(sklearn_preprocessing, scaler)().fit(urgency),
+        "priority_encoder": sklearn_preprocessing.LabelEncoder().fit(PRIORITIES),
+    }
+    from_pickle, from_json = dump_and_load(
+        tmp_path, fitted, json_convertor.export_priority_encoders, preprocessing.load_priority_encoders
+    )
+
+    assert_same_transforms(from_pickle, from_json, {
+        "task_type_encoder": np.array(TASK_TYPES[::-1] * 3).reshape(-1, 1),
+        "hours_scaler": rng.uniform(-10, 800, (50, 1)),
+        "urgency_scaler": rng.integers(0, 21, (50, 1)),
+    })
+    indices = rng.integers(0, len(PRIORITIES), 50)
+    assert list(from_json["priority_encoder"].inverse_transform(indices)) == \
+        list(from_pickle["priority_encoder"].inverse_transform(indices))
+
+
+def test_capacity_scalers_json_matches_pickle(tmp_path):
+    rng = np.random.default_rng(1)
+    fitted = {
+        f"{name}_scaler": sklearn_preprocessing.StandardScaler().fit(rng.uniform(0, 300, (200, 1)))
+        for name in CAPACITY_FEATURES
+    }
+    from_pickle, from_json = dump_and_load(
+        tmp_path, fitted, json_convertor.export_capacity_scalers, preprocessing.load_capacity_scalers
+    )
+
+    assert_same_transforms(from_pickle, from_json, {
+        f"{name}_scaler": rng.uniform(-50, 400, (50, 1)) for name in CAPACITY_FEATURES
+    })
+
+
+@pytest.mark.parametrize("name", ["priority", "capacity"])
+def test_shipped_json_matches_shipped_pickle(name):
+    files = load.MODEL_FILES[name]
+    json_path, pickle_path = load.get_path(files["params"]), load.get_path(files["params_pkl"])
+    if not (os.path.exists(json_path) and os.path.exists(pickle_path)):
+        pytest.skip("файлы модели не лежат рядом с клиентом")
+
+    with open(pickle_path, "rb") as f:
+        from_pickle = pickle.load(f)
+    from_json = load.PARAMS_LOADERS[name](json_path)
+
+    rng = np.random.default_rng(2)
+    if name == "priority":
+        categories = from_pickle["task_type_encoder"].categories_[0]
+        inputs = {
+            "task_type_encoder": rng.choice(categories, 50).reshape(-1, 1),
+            "hours_scaler": rng.uniform(0, 500, (50, 1)),
+            "urgency_scaler": rng.integers(0, 21, (50, 1)),
+        }
+        indices = rng.integers(0, len(from_pickle["priority_encoder"].classes_), 50)
+        assert list(from_json["priority_encoder"].inverse_transform(indices)) == \
+            list(from_pickle["priority_encoder"].inverse_transform(indices))
+    else:
+        inputs = {f"{feature}_scaler": rng.uniform(0, 300, (50, 1)) for feature in CAPACITY_FEATURES}
+    assert_same_transforms(from_pickle, from_json, inputs)
@@ -0,0 +1,72 @@
+import random
+import uuid
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from conftest import TASK_TYPES, random_layers
+from local_db import data_manager
+from local_db.models import Task, TaskChange
+from ml import load, preprocessing
+
+# 10 типов в one-hot + часы до дедлайна дают 11 входов head1, как у обученной модели
+MODEL_TASK_TYPES = TASK_TYPES + ["Research", "Design", "Review", "Support", "Testing", "Planning"]
+PRIORITIES = ["Casual", "Extreme", "High", "Low", "Mid"]
+
+
+@pytest.fixture
+def priority_model(monkeypatch):
+    model = load.NUMPY_MODELS["priority"](random_layers("priority", np.random.default_rng(0)))
+    encoders = {
+        "task_type_encoder": preprocessing.OneHot({name: i for i, name in enumerate(MODEL_TASK_TYPES)}),
+        "hours_scaler": preprocessing.Scaler({"type": "standard", "scale": [150.0], "mean": [200.0]}),
+        "urgency_scaler": preprocessing.Scaler({"type": "standard", "scale": [3.0], "mean": [5.0]}),
+        "priority_encoder": preprocessing.Labels(PRIORITIES),
+    }
+    monkeypatch.setitem(load._models, "priority", (model, encoders))
+
+
+def test_batch_matches_single_predictions(priority_model):
+    rng = random.Random(0)
+    task_types = [rng.choice(MODEL_TASK_TYPES) for _ in range(200)]
+    deadlines = [(date.today() + timedelta(days=rng.randint(-5, 90))).strftime("%Y-%m-%d") for _ in range(200)]
+    urgencies = [rng.randint(0, 10) for _ in range(200)]
+
+    batch = load.predict_priority_batch(task_types, deadlines, urgencies)
+    single = [load.predict_priority(*args) for args in zip(task_types, deadlines, urgencies)]
+    assert batch == single
+    # Случайные веса должны давать разные ответы, иначе сравнение ничего не проверяет
+    assert len(set(batch)) > 1
+
+
+def add_task(type_id, priority, status="underway"):
+    task_id = str(uuid.uuid4())
+    with data_manager.unit_of_work("test_add_task") as session:
+        session.add(Task(id=task_id, title="task", description="", task_type_id=type_id, personal_priority=2,
+                         influence=3, deadline=datetime(2030, 1, 1), final_priority=priority,
+                         status=status))
+    return task_id
+
+
+def test_reprioritize_updates_only_changed_underway_tasks(db):
+    same, changed, completed = add_task(1, "High"), add_task(2, "Low"), add_task(1, "Low", status="completed")
+    with data_manager.unit_of_work("test_clear_changes") as session:
+        session.query(TaskChange).delete()
+
+    calls = []
+
+    def predict_batch(task_types, deadlines, urgencies):
+        calls.append((task_types, deadlines, urgencies))
+        return ["High"] * len(task_types)
+
+    assert data_manager.reprioritize_underway_tasks(predict_batch) == 1
+    assert sorted(calls[0][0]) == ["Meeting", "Other"]
+    assert calls[0][1:] == (["2030-01-01"] * 2, [5, 5])
+
+    session = data_manager.Session()
+    priorities = {task.id: task.final_priority for task in session.query(Task)}
+    changes = {(change.task_id, change.field) for change in session.query(TaskChange)}
+    session.close()
+    assert priorities == {same: "High", changed: "High", completed: "Low"}
+    assert changes == {(changed, "final_priority")}
@@ -0,0 +1,74 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, inspect, text
+
+from api.sync_service import SyncService
+from conftest import StoredSettings
+from local_db import data_manager
+from local_db.models import Task, TaskChange
+
+
+@pytest.fixture
+def statements(db):
+    # SQL, который приложение на самом деле отправляет в базу, с параметрами
+    executed = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        executed.append((statement, parameters))
+
+    event.listen(db, "before_cursor_execute", capture)
+    yield executed
+    event.remove(db, "before_cursor_execute", capture)
+
+
+def query_plan(db, statements, fragment):
+    statement, parameters = next((sql, params) for sql, params in statements if fragment in sql)
+    with db.connect() as connection:
+        return " | ".join(row[3] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters))
+
+
+def add_tasks(count):
+    now = datetime.now()
+    with data_manager.unit_of_work("test_add_tasks") as session:
+        session.add_all([
+            Task(id=str(uuid.uuid4()), title=f"task {i}", description="", deadline=now + timedelta(days=i - count // 2),
+                 status=("underway", "completed", "overdue")[i % 3])
+            for i in range(count)
+        ])
+
+
+def test_overdue_update_uses_status_deadline_index(db, statements):
+    add_tasks(30)
+    data_manager.update_tasks_status()
+
+    plan = query_plan(db, statements, "WHERE tasks.status = ? AND tasks.deadline < ?")
+    assert "INDEX ix_tasks_status_deadline (status=? AND deadline<?)" in plan
+
+
+def test_sync_push_uses_updated_at_index(db, statements, monkeypatch):
+    add_tasks(30)
+    with data_manager.unit_of_work("test_clear_changes") as session:
+        session.query(TaskChange).delete()
+    monkeypatch.setattr(SyncService, "_pull", lambda self, session, last_sync: None)
+    service = SyncService(token="token")
+    monkeypatch.setattr(service, "_push_chunk", lambda payload: pytest.fail("нет сервера"))
+    # Настройки пользователя не трогаем: после синхронизации в будущем отправлять нечего
+    service.settings = StoredSettings(last_sync_time="2100-01-01T00:00:00Z")
+    assert service.run_sync() == (True, "Синхронизация завершена")
+
+    plan = query_plan(db, statements, "WHERE tasks.updated_at >")
+    assert "INDEX ix_tasks_updated_at (updated_at>?)" in plan
+    # Задачи с записями в task_changes ищутся по первичному ключу, а не полным обходом tasks
+    assert "SEARCH tasks USING INDEX sqlite_autoindex_tasks_1 (id=?)" in plan
+
+
+def test_unused_deadline_index_is_dropped(db):
+    with db.begin() as connection:
+        connection.execute(text("CREATE INDEX ix_tasks_deadline ON tasks (deadline)"))
+    data_manager._migrate_schema()
+
+    assert {index["name"] for index in inspect(db).get_indexes("tasks")} == {
+        "ix_tasks_status_deadline", "ix_tasks_updated_at"
+    }
@@ -0,0 +1,122 @@
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import requests
+
+from api.sync_service import SyncService
+from conftest import StoredSettings
+from local_db import data_manager
+
+
+def response(status_code, accept_encoding=None):
+    resp = requests.Response()
+    resp.status_code = status_code
+    if accept_encoding:
+        resp.headers["Accept-Encoding"] = accept_encoding
+    resp._content = b"{}"
+    return resp
+
+
+class ScriptedHttp:
+    # Отдает заранее заданные ответы и запоминает, что ушло на сервер
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.sent = []
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        self.sent.append((data, headers))
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr("api.sync_service.time.sleep", lambda seconds: None)
+    service = SyncService(token="token")
+    service.compress_min_bytes = 0
+    return service
+
+
+PAYLOAD = {"tasks": [{"id": "1", "title": "task"}]}
+
+
+def test_requests_are_plain_until_server_accepts_gzip(service):
+    service.http = ScriptedHttp([response(200), response(200, "gzip"), response(200)])
+    for _ in range(3):
+        service._push_chunk(PAYLOAD)
+
+    (first, first_headers), (second, _), (third, third_headers) = service.http.sent
+    assert "Content-Encoding" not in first_headers
+    assert json.loads(second) == PAYLOAD
+    assert third_headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(third)) == PAYLOAD
+
+
+def test_error_responses_do_not_change_encoding(service):
+    # Ошибка от прокси без заголовка не отключает сжатие, ошибка с заголовком его не включает
+    service.http = ScriptedHttp([response(502, "gzip"), response(200)])
+    service.retry_attempts = 2
+    service._push_chunk(PAYLOAD)
+    assert service.gzip_requests is False
+
+    service.gzip_requests = True
+    service.http = ScriptedHttp([response(502), response(200, "gzip")])
+    service._push_chunk(PAYLOAD)
+    assert all(headers.get("Content-Encoding") == "gzip" for _, headers in service.http.sent)
+    assert service.gzip_requests is True
+
+
+class ServerStub:
+    # Сервер синхронизации: принимает все отправленное, при загрузке отдает server_time позже правок
+    def __init__(self, on_push=None):
+        self.on_push = on_push
+        self.pushed = []
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        payload = json.loads(data)
+        self.pushed.append(payload)
+        if self.on_push:
+            self.on_push, on_push = None, self.on_push
+            on_push()
+        resp = response(200)
+        resp._content = json.dumps({"results": [
+            {"id": item["id"], "accepted": True} for item in payload["tasks"] + payload["changes"]
+        ]}).encode()
+        return resp
+
+    def get(self, url, params=None, timeout=None):
+        resp = response(200)
+        server_time = (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat().replace("+00:00", "Z")
+        resp._content = json.dumps({"server_time": server_time, "tasks": [], "changes": []}).encode()
+        return resp
+
+
+def pushed_ids(payloads):
+    return {item["id"]: item for payload in payloads for item in payload["tasks"] + payload["changes"]}
+
+
+def test_edits_made_during_push_go_out_next_sync(db, service):
+    service.settings = StoredSettings()
+    edited = data_manager.create_task("edited", "desc", "Meeting", 1, 1, "2030-01-01", "Mid")
+    data_manager.create_task("other", "desc", "Meeting", 1, 1, "2030-01-01", "Mid")
+    created = []
+
+    def edit_in_window():
+        # Пользователь правит задачу, уже попавшую в отправку, и заводит новую
+        data_manager.save_task_edit(edited, "2030-01-01", "underway", "High", "Meeting")
+        created.append(data_manager.create_task("created", "desc", "Other", 1, 1, "2030-01-01", "Low"))
+
+    service.http = ServerStub(on_push=edit_in_window)
+    assert service.run_sync() == (True, "Синхронизация завершена")
+    assert pushed_ids(service.http.pushed)[edited]["final_priority"] == "Mid"
+
+    service.http = ServerStub()
+    assert service.run_sync() == (True, "Синхронизация завершена")
+    pushed = pushed_ids(service.http.pushed)
+    assert set(pushed) == {edited, created[0]}
+    assert pushed[edited]["final_priority"] == "High"
+
+    service.http = ServerStub()
+    assert service.run_sync() == (True, "Синхронизация завершена")
+    assert service.http.pushed == []
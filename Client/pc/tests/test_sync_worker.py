@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+from PyQt6.QtCore import QCoreApplication
+
+from api import sync_worker
+from api.sync_worker import SyncController
+
+
+@pytest.fixture
+def app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+def process_events_until(app, condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    return condition()
+
+
+class BlockingService:
+    # Синхронизация, которая не проверяет отмену, пока ее не отпустят, - как запрос в повторах
+    def __init__(self):
+        self.release = threading.Event()
+        self.timings, self.merged_ids = {}, {}
+
+    def run_sync(self, progress=None, cancelled=None):
+        self.release.wait(5)
+        return True, "Синхронизация завершена"
+
+
+@pytest.fixture
+def controller(app, monkeypatch):
+    monkeypatch.setattr(sync_worker, "STOP_TIMEOUT_MS", 50)
+    controller = SyncController(token="token")
+    controller.service = BlockingService()
+    controller.results = []
+    controller.finished.connect(lambda *args: controller.results.append(args))
+    return controller
+
+
+def test_stop_does_not_wait_for_stuck_sync(app, controller):
+    stopped = []
+    controller.stopped.connect(lambda: stopped.append(True))
+    controller.start()
+    started = time.monotonic()
+
+    assert controller.stop() is False
+    assert time.monotonic() - started < 1
+    assert not controller.is_running()
+    assert len(controller._abandoned) == 1
+    # Выход из аккаунта ждет stopped, пока поток держит базу
+    assert controller.stop() is False
+
+    controller.service.release.set()
+    assert process_events_until(app, lambda: stopped)
+    assert controller._abandoned == []
+    # Результат брошенной синхронизации не доходит до окна
+    assert controller.results == []
+
+
+def test_stop_joins_sync_that_finishes_in_time(app, controller):
+    controller.service.release.set()
+    controller.start()
+
+    assert controller.stop() is True
+    assert controller._abandoned == []
+    assert process_events_until(app, lambda: controller.results)
+    assert controller.results[0][:2] == (True, "Синхронизация завершена")
@@ -0,0 +1,61 @@
+import uuid
+from datetime import datetime, timedelta
+
+from local_db import data_manager
+from local_db.models import Task, TaskChange
+
+
+def recorded_changes():
+    session = data_manager.Session()
+    changes = {(change.task_id, change.field) for change in session.query(TaskChange)}
+    session.close()
+    return changes
+
+
+def clear_changes():
+    # Как после успешной отправки на сервер
+    with data_manager.unit_of_work("test_clear_changes") as session:
+        session.query(TaskChange).delete()
+
+
+def test_new_task_is_sent_whole(db):
+    task_id = data_manager.create_task("task", "desc", "Meeting", 1, 1, "2030-01-01", "Mid")
+    assert recorded_changes() == {(task_id, "*")}
+
+
+def test_edit_records_only_changed_fields(db):
+    task_id = data_manager.create_task("task", "desc", "Meeting", 1, 1, "2030-01-01", "Mid")
+    clear_changes()
+
+    # Дедлайн, статус и тип записываются теми же значениями и изменением не считаются
+    data_manager.save_task_edit(task_id, "2030-01-01", "underway", "High", "Meeting")
+    assert recorded_changes() == {(task_id, "final_priority")}
+
+    data_manager.save_task_edit(task_id, "2030-02-01", "underway", "High", "Other")
+    assert recorded_changes() == {(task_id, "final_priority"), (task_id, "deadline"), (task_id, "task_type_id")}
+
+
+def test_overdue_bulk_update_records_status(db):
+    now = datetime.now()
+    ids = {name: str(uuid.uuid4()) for name in ("late", "on_time", "completed")}
+    with data_manager.unit_of_work("test_add_tasks") as session:
+        session.add_all([
+            Task(id=ids["late"], title="late", description="", deadline=now - timedelta(days=1), status="underway"),
+            Task(id=ids["on_time"], title="on time", description="", deadline=now + timedelta(days=1), status="underway"),
+            Task(id=ids["completed"], title="done", description="", deadline=now - timedelta(days=1), status="completed"),
+        ])
+    clear_changes()
+
+    assert data_manager.update_tasks_status() == [ids["late"]]
+    assert recorded_changes() == {(ids["late"], "status")}
+
+
+def test_changes_merged_from_server_are_not_recorded(db):
+    task_id = data_manager.create_task("task", "desc", "Meeting", 1, 1, "2030-01-01", "Mid")
+    clear_changes()
+
+    session = data_manager.Session(info={"sync": True})
+    session.get(Task, task_id).title = "from server"
+    session.commit()
+    session.close()
+    assert recorded_changes() == set()
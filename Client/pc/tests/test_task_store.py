@@ -0,0 +1,114 @@
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from api.sync_service import SyncService
+from local_db import data_manager
+from local_db.models import Task
+from local_db.task_store import PRIORITY_RANK, TaskStore
+
+
+@pytest.fixture
+def store(db):
+    store = TaskStore()
+    store.signals = []
+    store.task_added.connect(lambda task_id: store.signals.append(("added", task_id)))
+    store.task_updated.connect(lambda task_id: store.signals.append(("updated", task_id)))
+    store.reloaded.connect(lambda: store.signals.append(("reloaded", None)))
+    return store
+
+
+def add_task(**fields):
+    task_id = str(uuid.uuid4())
+    with data_manager.unit_of_work("test_add_task") as session:
+        session.add(Task(id=task_id, title="task", description="", deadline=datetime.now() + timedelta(days=3), **fields))
+    return task_id
+
+
+def remote_task(task_id, title, updated_at):
+    return {
+        "id": task_id, "title": title, "description": "", "task_type_id": 1, "status": "underway",
+        "final_priority": "Mid", "created_at": "2026-01-01T00:00:00Z", "updated_at": updated_at,
+        "deadline": "2030-01-01T00:00:00Z",
+    }
+
+
+def test_capacity_features_without_priorities_are_zero(store):
+    add_task(status="underway")
+    store.reload()
+
+    active, avg_priority, max_priority, _, overdue = store.capacity_features()
+    assert (active, avg_priority, max_priority, overdue) == (1, 0, 0, 0)
+
+
+def test_count_by_type_without_tasks_is_empty(store):
+    assert store.count_by_type() == ([], [])
+    assert store.count_by_type("completed") == ([], [])
+
+
+def test_sync_merge_refreshes_only_merged_tasks(store):
+    local_id = add_task(status="underway")
+    store.reload()
+    store.signals.clear()
+
+    service = SyncService(token="token")
+    new_id = str(uuid.uuid4())
+    session = data_manager.Session(info={"sync": True})
+    service.timings = {"merge": 0.0}
+    service._merge_page(session, [
+        remote_task(new_id, "from server", "2026-01-02T00:00:00Z"),
+        # Локальная версия новее - задача не меняется и не перерисовывается
+        remote_task(local_id, "stale", "2000-01-01T00:00:00Z"),
+    ])
+    session.close()
+
+    store.refresh_tasks(list(service.merged_ids))
+    assert store.signals == [("added", new_id)]
+    assert store.get(new_id).title == "from server"
+    assert store.get(local_id).title == "task"
+
+
+def test_store_loads_only_on_reload(store):
+    task_id = add_task(status="underway")
+    assert not store.loaded and store.tasks == {}
+
+    # Синхронизация, закончившаяся до первой загрузки, ничего не подгружает по одной задаче
+    store.refresh_tasks([task_id])
+    assert store.tasks == {} and store.signals == []
+
+    store.reload()
+    assert store.loaded and store.get(task_id) is not None
+
+
+def capacity_by_scan(store):
+    # Прежний расчет обходом всех задач в работе
+    active = store.with_status("underway")
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    ranks = [PRIORITY_RANK[task.final_priority] for task in active if task.final_priority in PRIORITY_RANK]
+    hours = sum((task.deadline - now).total_seconds() for task in active) / 3600 / len(active)
+    return len(active), sum(ranks) / len(ranks) if ranks else 0, max(ranks, default=0), hours, \
+        len(store.by_status.get("overdue", ()))
+
+
+def test_capacity_features_follow_refreshes(store):
+    rng = random.Random(0)
+    ids = [add_task(status=rng.choice(("underway", "overdue", "completed")),
+                    final_priority=rng.choice(list(PRIORITY_RANK) + [None])) for _ in range(30)]
+    store.reload()
+
+    for _ in range(5):
+        changed = rng.sample(ids, 8)
+        with data_manager.unit_of_work("test_edit_tasks") as session:
+            for task in session.query(Task).filter(Task.id.in_(changed)):
+                task.status = rng.choice(("underway", "overdue", "completed"))
+                task.final_priority = rng.choice(list(PRIORITY_RANK) + [None])
+                task.deadline = datetime.now() + timedelta(hours=rng.randint(-100, 500))
+        store.refresh_tasks(changed)
+
+        active, avg_priority, max_priority, hours, overdue = store.capacity_features()
+        expected = capacity_by_scan(store)
+        assert (active, max_priority, overdue) == (expected[0], expected[2], expected[4])
+        assert avg_priority == pytest.approx(expected[1])
+        assert abs(hours - expected[3]) < 1
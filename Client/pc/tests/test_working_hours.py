@@ -0,0 +1,72 @@
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from ml.working_hours import WORK_END, WORK_START, calculate_working_hours_array, working_hours_between
+
+
+def working_hours_by_days(now, deadline):
+    # Прежний обход по дням, на результатах которого обучена модель приоритета
+    if deadline <= now:
+        return 0
+    total_working_hours = 0
+    current_time = now
+    while current_time.date() < deadline.date() or (
+        current_time.date() == deadline.date() and current_time.hour < deadline.hour
+    ):
+        if current_time.weekday() >= 5:
+            current_time += timedelta(days=1)
+            current_time = current_time.replace(hour=WORK_START, minute=0, second=0, microsecond=0)
+            continue
+        if current_time.hour < WORK_START:
+            current_time = current_time.replace(hour=WORK_START, minute=0, second=0, microsecond=0)
+        if current_time.hour >= WORK_END:
+            current_time += timedelta(days=1)
+            current_time = current_time.replace(hour=WORK_START, minute=0, second=0, microsecond=0)
+            continue
+        end_of_day = current_time.replace(hour=WORK_END, minute=0, second=0, microsecond=0)
+        hours_to_end_of_day = max(0, (end_of_day - current_time).total_seconds() / 3600)
+        if current_time.date() == deadline.date():
+            hours_to_deadline = max(0, (deadline - current_time).total_seconds() / 3600)
+            total_working_hours += min(hours_to_deadline, hours_to_end_of_day)
+            break
+        total_working_hours += hours_to_end_of_day
+        current_time += timedelta(days=1)
+        current_time = current_time.replace(hour=WORK_START, minute=0, second=0, microsecond=0)
+    return round(total_working_hours, 2)
+
+
+def random_moments(rng, count):
+    base = datetime(2024, 1, 1)
+    pairs = []
+    for _ in range(count):
+        now = base + timedelta(days=rng.randint(0, 400), minutes=rng.randint(0, 24 * 60 - 1))
+        # Дедлайны клиента приходятся на полночь, у обучающих данных - на любой час, бывают ровно на часе
+        deadline = now + timedelta(days=rng.randint(-1, 120), minutes=rng.choice((0, rng.randint(0, 24 * 60 - 1))))
+        if rng.random() < 0.3:
+            deadline = deadline.replace(minute=0, second=0, microsecond=0)
+        if rng.random() < 0.2:
+            deadline = deadline.replace(hour=0, minute=0)
+        if rng.random() < 0.2:
+            # Дедлайн в тот же день, в том числе в пределах текущего часа
+            deadline = now + timedelta(minutes=rng.randint(1, 180))
+        pairs.append((now, deadline))
+    return pairs
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_closed_form_matches_day_loop(seed):
+    for now, deadline in random_moments(random.Random(seed), 300):
+        assert working_hours_between(now, deadline) == working_hours_by_days(now, deadline), (now, deadline)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_array_matches_day_loop(seed):
+    rng = random.Random(seed)
+    now = random_moments(rng, 1)[0][0]
+    deadlines = [now + timedelta(days=rng.randint(-1, 120), minutes=rng.randint(0, 24 * 60 - 1)) for _ in range(300)]
+    expected = [working_hours_by_days(now, deadline) for deadline in deadlines]
+    # np.round и round расходятся на 0.01 ровно на середине сотой
+    np.testing.assert_allclose(calculate_working_hours_array(deadlines, now), expected, atol=0.011)
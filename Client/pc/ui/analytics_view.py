@@ -1,20 +1,20 @@
 from PyQt6 import QtWidgets
-from PyQt6.QtWidgets import QWidget
+from PyQt6.QtWidgets import QWidget, QMessageBox
 from PyQt6.QtCore import Qt
 import pyqtgraph as pg
 import numpy as np
 
 
-from local_db.data_manager import select_priority_counts, select_all_tasks, select_tasks_by_type, select_completed_by_types, \
-    select_daily_tasks_underday
+from local_db.data_manager import select_priority_counts, select_all_tasks, select_daily_tasks_underday
 
 
 class AnslitycWindow(QWidget):
-    def __init__(self, option):
+    def __init__(self, option, store):
         super().__init__()
         self.setWindowFlag(Qt.WindowType.Window)
         self.setWindowModality(Qt.WindowModality.ApplicationModal)
         self.option = option
+        self.store = store
         self.initializeUI()
 
     def initializeUI(self):
@@ -85,7 +85,9 @@ class AnslitycWindow(QWidget):
                 coef_tasks_praph.getAxis('bottom').setTicks([ticks])
                 graph = coef_tasks_praph
             case 3:
-                types, tasks_count = select_tasks_by_type()
+                types, tasks_count = self.store.count_by_type()
+                if not types:
+                    QMessageBox.information(self, "Внимание", "Нет данных для отображения")
                 russian_types = [self.task_type_map.get(t, t) for t in types]
                 x = np.arange(len(russian_types))
                 height = np.array(tasks_count)
@@ -99,7 +101,9 @@ class AnslitycWindow(QWidget):
                 types_tasks_graph.getAxis('bottom').setTicks([ticks])
                 graph = types_tasks_graph
             case 4:
-                types, tasks_count = select_completed_by_types()
+                types, tasks_count = self.store.count_by_type("completed")
+                if not types:
+                    QMessageBox.information(self, "Внимание", "Нет данных для отображения")
                 russian_types = [self.task_type_map.get(t, t) for t in types]
                 x = np.arange(len(russian_types))
                 height = np.array(tasks_count)
@@ -1,17 +1,19 @@
 import sys
 
 from PyQt6.QtWidgets import QStackedWidget, QApplication
+from PyQt6.QtCore import pyqtSignal, QTimer
 
 from api.auth_manager import AuthManager
-from ui.login_window import LoginScreen
-from ui.main_window import MainWindow
 
 
 class AppManager(QStackedWidget):
+    first_painted = pyqtSignal()
+
     def __init__(self):
         super().__init__()
         self.setMinimumSize(800, 600)
         self.setWindowTitle("Self Productivity System")
+        self.painted = False
 
         saved_token = AuthManager.get_valid_token()
 
@@ -20,7 +22,14 @@ class AppManager(QStackedWidget):
         else:
             self.show_login_screen()
 
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.painted:
+            self.painted = True
+            QTimer.singleShot(0, self.first_painted.emit)
+
     def show_login_screen(self):
+        from ui.login_window import LoginScreen
         self.login_screen = LoginScreen(on_success=self.show_main_window)
         self.addWidget(self.login_screen)
         self.setCurrentWidget(self.login_screen)
@@ -28,13 +37,30 @@ class AppManager(QStackedWidget):
     def show_main_window(self, token):
         AuthManager.save_session(token)
         self.token = token
+        from ui.main_window import MainWindow
         self.main_window = MainWindow(token)
         self.addWidget(self.main_window)
         self.setCurrentWidget(self.main_window)
+        # При старте задачи и графики загружает main.py после первой отрисовки и обслуживания базы
+        if self.painted:
+            QTimer.singleShot(0, self.refresh_main_window)
+
+    def refresh_main_window(self, changed_ids=()):
+        if not hasattr(self, "main_window"):
+            return
+        store = self.main_window.store
+        if store.loaded:
+            store.refresh_tasks(changed_ids)
+        else:
+            store.reload()
+        self.main_window.refreshSummaries()
+
+
+def create_application():
+    return QApplication(sys.argv)
 
 
-def run_app():
-    app = QApplication(sys.argv)
+def create_manager():
     manager = AppManager()
     manager.setStyleSheet("""
         QWidget {
@@ -168,5 +194,4 @@ def run_app():
         border-radius: 8px;
     }
     """)
-    manager.show()
-    sys.exit(app.exec())
\ No newline at end of file
+    return manager
\ No newline at end of file
@@ -6,19 +6,14 @@ from PyQt6.QtWidgets import (QWidget, QLabel, QPushButton,
                              QScrollArea, QGridLayout, QMessageBox, QCheckBox)
 from PyQt6.QtGui import QPixmap, QPainter, QPainterPath, QFont
 from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QSettings
-import pyqtgraph as pg
-import numpy as np
 import sys
 
 from api.auth_manager import AuthManager
-from api.sync_service import SyncService
-from local_db.data_manager import (select_daily_tasks, select_task_property_for_edit, select_underway_tasks,
-                                   select_daily_task_complete, select_closest_tasks, select_capacity_parametrs,
-                                   select_completed_tasks)
-from ml.load import predict_capacity
-from ui.task_create_view import TaskWindow
-from ui.task_edit_view import EditWindow
-from ui.analytics_view import  AnslitycWindow
+from api.sync_worker import SyncController
+from local_db.data_manager import select_daily_task_complete, reprioritize_underway_tasks
+from local_db.task_store import TaskStore
+
+SYNC_PHASE_NAMES = {"push": "отправка", "pull": "загрузка", "merge": "слияние"}
 
 def draw_circular_progress(ax, percentage, color="dodgerblue"):
     ax.clear()
@@ -55,9 +50,18 @@ class MainWindow(QWidget):
         self.calendarScreen = QWidget()
         self.taskListScreen = QWidget()
         self.statisticScreen = QWidget()
+        self.store = TaskStore()
+        self.graphs_stale = True
+        self.summary_pending = False
         self.initializeUI()
+        self.store.task_added.connect(self.onTaskAdded)
+        self.store.task_updated.connect(self.onTaskUpdated)
+        self.store.reloaded.connect(self.onTasksReloaded)
         self.token = token
-        self.sync_service = SyncService(token=self.token)
+        self.sync_controller = SyncController(self.token, self)
+        self.sync_controller.started.connect(self.onSyncStarted)
+        self.sync_controller.progress.connect(self.sync_status.setText)
+        self.sync_controller.finished.connect(self.onSyncFinished)
         QTimer.singleShot(1000, self.run_auto_sync)
 
         self.sync_timer = QTimer(self)
@@ -99,10 +103,23 @@ class MainWindow(QWidget):
         self.Sync = QPushButton("Синхронизировать данные")
         self.Sync.clicked.connect(self.syncro)
 
+        self.cancel_sync = QPushButton("Отменить синхронизацию")
+        self.cancel_sync.clicked.connect(self.cancelSync)
+        self.cancel_sync.hide()
+
+        self.sync_status = QLabel("")
+        self.sync_status.setWordWrap(True)
+
         Lout = QPushButton("Выйти из аккаунта")
         Lout.clicked.connect(self.handle_logout)
 
+        reprioritize = QPushButton("Пересчитать приоритеты")
+        reprioritize.clicked.connect(self.reprioritize_tasks)
+
         ava_calendar_layout.addWidget(self.Sync)
+        ava_calendar_layout.addWidget(self.cancel_sync)
+        ava_calendar_layout.addWidget(self.sync_status)
+        ava_calendar_layout.addWidget(reprioritize)
         ava_calendar_layout.addWidget(Lout)
         ava_calendar_layout.addStretch()
 
@@ -131,8 +148,9 @@ class MainWindow(QWidget):
 
         self.refresh_closest_tasks()
 
-        self.cap = build_capacity_graph()
-        self.compl_tasks = build_complete_task_graph()
+        # Графики требуют pyqtgraph и модель, поэтому строятся после первой отрисовки окна
+        self.cap = QWidget()
+        self.compl_tasks = QWidget()
 
         self.cap_stat_layout = QHBoxLayout()
         self.cap_stat_layout.addWidget(self.compl_tasks)
@@ -145,6 +163,15 @@ class MainWindow(QWidget):
         self.mainScreen.setLayout(main_layout)
     def setUpCalendarScreen(self):
         calendar_layout = QVBoxLayout(self.calendarScreen)
+        self.priority_map = {
+            "Авто": "Auto",
+            "Обычный": "Casual",
+            "Низкий": "Low",
+            "Средний": "Mid",
+            "Высокий": "High",
+            "Критичный": "Extreme"
+        }
+        self.reverse_priority_map = {v: k for k, v in self.priority_map.items()}
         description_label = QLabel("Для добавления задачи нажмите на желаемую дату и на кнопку 'Добавить задачу'",self)
         description_label.setStyleSheet("""QLabel {
             border: 2px solid #4a90e2;   /* рамка */
@@ -286,114 +313,118 @@ class MainWindow(QWidget):
     def goToCalendarScreen(self):
         self.stacked_layout.setCurrentWidget(self.calendarScreen)
     def goToTaskListScreen(self):
-        self.refreshTaskList()
         self.stacked_layout.setCurrentWidget(self.taskListScreen)
     def goToStatisticScreen(self):
         self.stacked_layout.setCurrentWidget(self.statisticScreen)
     def goToMainScreen(self):
-        new_close_task = select_closest_tasks()
-        while self.cls_tsk_layout.count():
-            item = self.cls_tsk_layout.takeAt(0)
-            widget = item.widget()
-            if widget is not None:
-                widget.deleteLater()
-        cls_task_label = QLabel("Задачи дедлайн которых наступит скоро", self)
-        cls_task_label.setStyleSheet("""QLabel {
-                    border: 2px solid #4a90e2;   /* рамка */
-                    border-radius: 6px;           /* скруглённые углы */
-                    padding: 6px;                 /* отступы от текста */
-                    color: #2e3440;               /* цвет текста */
-                    font-weight: bold;            /* жирный текст */
-                    font-size: 14px;              /* размер шрифта */
-                    qproperty-alignment: 'AlignCenter';  /* выравнивание по центру */
-                    background-color: #f8fafc; 
-                    }""")
-        self.cls_tsk_layout.addWidget(cls_task_label)
-        for title, description in new_close_task:
-            lbl = QLabel(f"{title}\n{description}", self)
-            lbl.setStyleSheet("""QLabel {
-            border: 2px solid #4a90e2;   /* рамка */
-            border-radius: 6px;           /* скруглённые углы */
-            padding: 6px;                 /* отступы от текста */
-            color: #2e3440;               /* цвет текста */
-            font-weight: bold;            /* жирный текст */
-            font-size: 14px;              /* размер шрифта */
-            qproperty-alignment: 'AlignCenter';  /* выравнивание по центру */
-            background-color: #f8fafc; 
-            }""")
-            self.cls_tsk_layout.addWidget(lbl)
+        # Ближайшие задачи обновляются по сигналам хранилища, графики - только если данные менялись
+        if self.graphs_stale:
+            self.refresh_graphs()
+        self.stacked_layout.setCurrentWidget(self.mainScreen)
 
+    def refresh_graphs(self):
+        self.graphs_stale = False
         new_fig = build_complete_task_graph()
         self.cap_stat_layout.replaceWidget(self.compl_tasks, new_fig)
         self.compl_tasks.deleteLater()
         self.compl_tasks = new_fig
 
-        new_cap = build_capacity_graph()
+        new_cap = build_capacity_graph(self.store.capacity_features())
         self.cap_stat_layout.replaceWidget(self.cap, new_cap)
         self.cap.deleteLater()
         self.cap = new_cap
 
-        self.stacked_layout.setCurrentWidget(self.mainScreen)
-
     def openTaskCreator(self):
         selected_date = self.calend.selectedDate().toPyDate()
         selected_date = str(selected_date)
+        from ui.task_create_view import TaskWindow
         self.task_creator = TaskWindow(deadline_str= selected_date)
-        self.task_creator.task_saved.connect(self.addTaskToList)
+        self.task_creator.task_saved.connect(self.store.refresh_task)
         self.task_creator.show()
     def dateSelect(self):
         date_select = self.calend.selectedDate().toPyDate()
         self.date_info_list.clear()
         self.date_info_list.addItem("Задачи,запланированные на: " + str(date_select) + "\n")
-        daily_task_list = select_daily_tasks(date_select)
-        self.priority_map = {
-            "Авто": "Auto",
-            "Обычный": "Casual",
-            "Низкий": "Low",
-            "Средний": "Mid",
-            "Высокий": "High",
-            "Критичный": "Extreme"
-        }
-        self.reverse_priority_map = {v: k for k, v in self.priority_map.items()}
-        for title, dash, priority in daily_task_list:
-            russian_priority = self.reverse_priority_map.get(priority, priority)
-            self.date_info_list.addItem(f"{title}{dash}{russian_priority}")
-    def addTaskToList(self,title,priority):
-        russian_priority = self.reverse_priority_map.get(priority, priority)
-        self.date_info_list.addItem(f"{title} — {russian_priority}")
-
-    def openTaskEditor(self, text):
-        params = select_task_property_for_edit(text)
-        title = params[0]
-        description = params[1]
-        t_type = params[2]
-        deadline_full = params[3]
-        deadline = deadline_full.date()
-        priority = params[4]
-        self.task_editor = EditWindow(title,description,t_type,deadline,priority,parent=self)
+        for task in self.store.on_date(date_select):
+            self.addTaskToList(task)
+    def addTaskToList(self, task):
+        russian_priority = self.reverse_priority_map.get(task.final_priority, task.final_priority)
+        self.date_info_list.addItem(f"{task.title} — {russian_priority}")
+
+    def openTaskEditor(self, task_id):
+        task = self.store.get(task_id)
+        from ui.task_edit_view import EditWindow
+        self.task_editor = EditWindow(task_id, task.title, task.description, task.task_type,
+                                      task.deadline.date(), task.final_priority, parent=self)
+        self.task_editor.task_saved.connect(self.store.refresh_task)
         self.task_editor.show()
     def refreshTaskList(self):
         grid = QWidget()
-        scroll_layout = QGridLayout(grid)
+        # Один стиль на контейнер вместо своего stylesheet у каждой кнопки
+        btn_color = "#2e7d32" if self.show_completed_cb.isChecked() else "#4a90e2"
+        grid.setStyleSheet(f"QPushButton {{ background-color: {btn_color}; padding: 10px; }}")
+        self.task_list_layout = QVBoxLayout(grid)
+        self.task_list_layout.addStretch(1)
+        self.task_buttons = {}
+
+        for task in self.store.with_status(*self.listedStatuses()):
+            self.addTaskButton(task)
+        self.task_scroll.setWidget(grid)
 
-        if hasattr(self, 'show_completed_cb') and self.show_completed_cb.isChecked():
-            tasks = select_completed_tasks()
-            btn_color = "#2e7d32"
-        else:
-            tasks = select_underway_tasks()
-            btn_color = "#4a90e2"
+    def listedStatuses(self):
+        if self.show_completed_cb.isChecked():
+            return ("completed",)
+        return ("underway", "overdue")
+
+    def addTaskButton(self, task):
+        task_btn = QPushButton(str(task.title))
+        task_btn.clicked.connect(lambda _, t=task.id: self.openTaskEditor(t))
+        self.task_list_layout.insertWidget(self.task_list_layout.count() - 1, task_btn)
+        self.task_buttons[task.id] = task_btn
+
+    def onTaskAdded(self, task_id):
+        task = self.store.get(task_id)
+        if task.status in self.listedStatuses():
+            self.addTaskButton(task)
+        self.scheduleSummaryRefresh()
+
+    def onTaskUpdated(self, task_id):
+        task = self.store.get(task_id)
+        button = self.task_buttons.get(task_id)
+        if task is not None and task.status in self.listedStatuses():
+            if button is None:
+                self.addTaskButton(task)
+            else:
+                button.setText(str(task.title))
+        elif button is not None:
+            self.task_buttons.pop(task_id).deleteLater()
+        self.scheduleSummaryRefresh()
+
+    def onTasksReloaded(self):
+        self.refreshTaskList()
+        self.scheduleSummaryRefresh()
 
-        for i, title in enumerate(tasks):
-            task_btn = QPushButton(str(title), self)
-            task_btn.setStyleSheet(f"QPushButton {{ background-color: {btn_color}; padding: 10px; }}")
-            task_btn.clicked.connect(lambda _, t=title: self.openTaskEditor(t))
-            scroll_layout.addWidget(task_btn, i, 0)
+    def scheduleSummaryRefresh(self):
+        # Пачка сигналов (синхронизация, просрочка) дает одно обновление сводных виджетов
+        if not self.summary_pending:
+            self.summary_pending = True
+            QTimer.singleShot(0, self.flushSummaryRefresh)
 
-        scroll_layout.setRowStretch(len(tasks), 1)
-        self.task_scroll.setWidget(grid)
+    def flushSummaryRefresh(self):
+        if self.summary_pending:
+            self.refreshSummaries()
+
+    def refreshSummaries(self):
+        self.summary_pending = False
+        self.refresh_closest_tasks()
+        self.dateSelect()
+        self.graphs_stale = True
+        if self.stacked_layout.currentWidget() is self.mainScreen:
+            self.refresh_graphs()
 
     def openStatistic(self, op):
-        self.ststistic_show  =  AnslitycWindow(op)
+        from ui.analytics_view import AnslitycWindow
+        self.ststistic_show  =  AnslitycWindow(op, self.store)
         self.ststistic_show.show()
 
     def refresh_closest_tasks(self):
@@ -405,7 +436,7 @@ class MainWindow(QWidget):
             else:
                 del item
 
-        top_tasks = select_closest_tasks()
+        top_tasks = self.store.closest(3)
 
         cls_task_label = QLabel("Задачи, дедлайн которых скоро")
         cls_task_label.setStyleSheet("""
@@ -428,9 +459,9 @@ class MainWindow(QWidget):
                 "color: #7f8c9a; font-style: italic; padding: 10px; qproperty-alignment: 'AlignCenter';")
             self.cls_tsk_layout.addWidget(empty_label)
         else:
-            for title, description in top_tasks:
+            for task in top_tasks:
                 task_card = QLabel(
-                    f"<b>{title}</b><br><span style='font-size:11px; color:#4c566a;'>{description}</span>")
+                    f"<b>{task.title}</b><br><span style='font-size:11px; color:#4c566a;'>{task.description}</span>")
 
                 task_card.setWordWrap(True)
                 task_card.setMinimumHeight(50)
@@ -458,11 +489,18 @@ class MainWindow(QWidget):
     def handle_logout(self):
         if hasattr(self, 'sync_timer'):
             self.sync_timer.stop()
+        # Базу удаляем только после того, как поток синхронизации ее отпустил: открытое соединение
+        # не дает удалить файл на Windows, а на остальных системах оставляет рядом -wal и -shm
+        if not self.sync_controller.stop():
+            self.setEnabled(False)
+            self.sync_status.setText("Выход: завершается синхронизация...")
+            self.sync_controller.stopped.connect(self.finish_logout)
+            return
+        self.finish_logout()
 
+    def finish_logout(self):
         try:
             from local_db import data_manager
-            data_manager.engine.dispose()
-
             db_path = data_manager.get_db_path()
 
             settings = QSettings("MyCompany", "SystemOfUserProductivity")
@@ -471,11 +509,10 @@ class MainWindow(QWidget):
 
             AuthManager.clear_session()
 
-            if os.path.exists(db_path):
-                import time
-                time.sleep(0.1)
-                os.remove(db_path)
-                print(f"✅ База удалена полностью: {db_path}")
+            import time
+            time.sleep(0.1)
+            data_manager.delete_database(db_path)
+            print(f"✅ База удалена полностью: {db_path}")
 
         except Exception as e:
             print(f"⚠️ Ошибка при выходе: {e}")
@@ -492,31 +529,52 @@ class MainWindow(QWidget):
             QMessageBox.warning(self, "Ошибка", "Нужна авторизация")
             return
 
-        self.Sync.setEnabled(False)
-        sync_service = SyncService(token)
-        success, message = sync_service.run_sync()
+        # Если синхронизация по таймеру уже идет, кнопка дожидается ее результата
+        self.sync_controller.start(manual=True, token=token)
 
-        if success:
-            QMessageBox.information(self, "Успех", message)
-            self.refresh_closest_tasks()
-        else:
-            QMessageBox.critical(self, "Ошибка", f"Синхронизация не удалась: {message}")
+    def cancelSync(self):
+        self.sync_status.setText("Отмена синхронизации...")
+        self.sync_controller.cancel()
 
-        self.Sync.setEnabled(True)
+    def onSyncStarted(self):
+        self.sync_status.setText("Синхронизация...")
+        self.cancel_sync.show()
 
-    def run_auto_sync(self):
-        print("🔄 Запуск автоматической синхронизации...")
-        success, message = self.sync_service.run_sync()
+    def onSyncFinished(self, success, message, timings, merged_ids, manual):
+        self.cancel_sync.hide()
+        phases = ", ".join(f"{SYNC_PHASE_NAMES[phase]} {seconds:.1f} с" for phase, seconds in timings.items())
+        self.sync_status.setText(f"{message}\n{phases}" if phases else message)
 
-        if success:
-            print(f"✅ Авто-синхронизация: {message}")
-            self.refresh_closest_tasks()
+        # Часть страниц могла записаться и до ошибки
+        self.store.refresh_tasks(merged_ids)
+        if manual and success:
+            QMessageBox.information(self, "Успех", message)
+        elif manual:
+            QMessageBox.critical(self, "Ошибка", f"Синхронизация не удалась: {message}")
+        elif success:
+            print(f"✅ Авто-синхронизация: {message} ({phases})")
         else:
             print(f"❌ Ошибка авто-синхронизации: {message}")
 
+    def reprioritize_tasks(self):
+        from ml.load import predict_priority_batch
+        try:
+            changed = reprioritize_underway_tasks(predict_priority_batch)
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось пересчитать приоритеты: {e}")
+            return
+
+        QMessageBox.information(self, "Готово", f"Приоритет изменен у задач: {changed}")
+        self.store.reload()
+
+    def run_auto_sync(self):
+        if self.sync_controller.start():
+            print("🔄 Запуск автоматической синхронизации...")
+
 
 
 def build_complete_task_graph():
+    import pyqtgraph as pg
     data = select_daily_task_complete()
     if not data:
         data = []
@@ -538,12 +596,12 @@ def build_complete_task_graph():
     return plot_widget
 
 
-def build_capacity_graph():
-    active_tasks, avg_priority, max_priority, avg_hours_to_deadline, overdue_tasks = select_capacity_parametrs()
-    if (active_tasks, avg_priority, max_priority, avg_hours_to_deadline, overdue_tasks) == (0, 0, 0, 0, 0):
-        percentage = 0
-    else:
-        percentage =  predict_capacity(active_tasks, avg_priority, max_priority, avg_hours_to_deadline, overdue_tasks)
+def build_capacity_graph(features):
+    import numpy as np
+    import pyqtgraph as pg
+    from ml.load import predict_capacity
+
+    percentage = predict_capacity(*features) if any(features) else 0
 
     pw = pg.PlotWidget()
     pw.setAspectLocked()
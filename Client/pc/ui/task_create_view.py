@@ -3,15 +3,10 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout,QLineEdit,QPushButton,QLabel,Q
                              QComboBox,QMessageBox)
 from PyQt6.QtCore import pyqtSignal, Qt
 
-from local_db.data_manager import insert_task, update_daily_info_add_task, select_tasks_for_dupsearch, \
-    select_duplicate_deadline
-from datetime import date as dt_date
-from difflib import SequenceMatcher
-
-from ml.load import  predict_priority
+from local_db.data_manager import create_task, find_duplicate_tasks
 
 class TaskWindow(QWidget):
-    task_saved = pyqtSignal(str, str)
+    task_saved = pyqtSignal(str)
     def __init__(self, deadline_str):
         super().__init__()
         self.setWindowFlag(Qt.WindowType.Window)
@@ -240,11 +235,10 @@ class TaskWindow(QWidget):
         priority = self.priority_map.get(russian_priority, russian_priority)
         deadline = self.deadline_str
         urgency = influence + self_priority
-        tasks = select_tasks_for_dupsearch()
-        duplicates = check_for_duplicates(title, desc, tasks)
+        duplicates = find_duplicate_tasks(title, desc)
         if duplicates:
             top_dup = duplicates[0]
-            dup_deadline = select_duplicate_deadline(top_dup[0],top_dup[1])
+            dup_deadline = top_dup[2].date()
             msg = QMessageBox(self)
             msg.setWindowTitle("Похожая задача найдена")
             msg.setText(
@@ -260,23 +254,8 @@ class TaskWindow(QWidget):
             if user_choice == QMessageBox.StandardButton.No:
                 return
         if priority == "Auto":
+            from ml.load import predict_priority
             priority = predict_priority(task_type,deadline,urgency)
-        insert_task(title, desc, task_type, self_priority, influence, deadline ,priority)
-        today = dt_date.today()
-        update_daily_info_add_task(today)
-        self.task_saved.emit(title, priority)
+        task_id = create_task(title, desc, task_type, self_priority, influence, deadline ,priority)
+        self.task_saved.emit(task_id)
         self.close()
-
-
-
-def check_for_duplicates(new_title: str, new_description: str, tasks: list, threshold: float = 0.8):
-    duplicates = []
-    for title, description in tasks:
-        title_similarity = SequenceMatcher(None, new_title.lower(), title.lower()).ratio()
-        desc_similarity = SequenceMatcher(None, new_description.lower(), description.lower()).ratio()
-
-        if (title_similarity >= threshold or desc_similarity >= threshold) and new_description.lower() != '':
-            duplicates.append((title, description, title_similarity, desc_similarity))
-
-    return duplicates
-
@@ -1,16 +1,17 @@
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLineEdit, QPushButton, QLabel, QComboBox, \
     QHBoxLayout, QCheckBox
-from PyQt6.QtCore import Qt
-from datetime import date as dt_date
+from PyQt6.QtCore import Qt, pyqtSignal
 
-from local_db.data_manager import update_task_propeties, update_daily_info_complete_task
+from local_db.data_manager import save_task_edit
 
 
 class EditWindow(QWidget):
-    def __init__(self,title,description,t_type,ddln,priority, parent):
+    task_saved = pyqtSignal(str)
+    def __init__(self,task_id,title,description,t_type,ddln,priority, parent):
         super().__init__()
         self.setWindowFlag(Qt.WindowType.Window)
         self.setWindowModality(Qt.WindowModality.ApplicationModal)
+        self.task_id = task_id
         self.title = title
         self.description = description
         self.t_type = t_type
@@ -265,8 +266,6 @@ class EditWindow(QWidget):
     def updateTask(self):
         if self.done_checkbox.isChecked() == True:
             new_status = "completed"
-            today = dt_date.today()
-            update_daily_info_complete_task(today,self.title,self.description)
         elif self.cancel_checkbox.isChecked() == True:
             new_status = "cancelled"
         else:
@@ -277,13 +276,9 @@ class EditWindow(QWidget):
         russian_priority = self.priority_edcombo.currentText()
         new_priority = self.priority_map.get(russian_priority, russian_priority)
         new_deadline = self.deadline_edline.text()
-        update_task_propeties(self.title, self.description, new_deadline, new_status, new_priority, new_task_type)
+        save_task_edit(self.task_id, new_deadline, new_status, new_priority, new_task_type)
+        self.task_saved.emit(self.task_id)
         self.close()
 
-    def closeEvent(self, event):
-        if self.parent:
-            self.parent.refreshTaskList()
-        event.accept()
-
 
 